@@ -10,6 +10,7 @@ from . import ui_panel
 from . import version
 from . import icons
 from . import animall
+from . import stream
 from bpy.app.handlers import persistent
 
 bl_info = {
@@ -29,6 +30,7 @@ bl_info = {
 # custom_properties:
 # key_id = the container object id, may change later to allow copying frames across objects
 # key_object = the swap NAME data currently in use
+# key_frame = (key_id, key_frame_id) of the frame object currently in use
 # key_object_id = the id NEEDED and set by the key
 
 # /Applications/Blender.app/Contents/MacOS/Blender
@@ -118,6 +120,17 @@ class KEY_PT_Main(bpy.types.Panel):
                             icon_value=icons.getIconId("separate_objects_16"))
         colButtons.operator("key.combine_objects", text="",
                             icon_value=icons.getIconId("combine_objects_16"))
+        colButtons.operator("key.dedup_frames", text="", icon='LINKED')
+        colButtons.operator("key.clean_frames", text="", icon='TRASH')
+        colButtons.operator("key.compress_frames", text="", icon='PACKAGE')
+        colButtons.operator("key.expand_frames", text="", icon='UGLYPACKAGE')
+        if context.object is not None and context.object.get("key_inplace") == True:
+            colButtons.operator("key.swap_mode", text="",
+                                icon='MOD_DATA_TRANSFER', depress=True).in_place = False
+        else:
+            colButtons.operator("key.swap_mode", text="",
+                                icon='MOD_DATA_TRANSFER').in_place = True
+        colButtons.operator("key.benchmark_swap", text="", icon='TIME')
 
         row = layout.row()
         split = row.split(factor=0.25, align=True)
@@ -151,6 +164,13 @@ class KEY_PT_Main(bpy.types.Panel):
         colButtons.operator("key.set_space", text="",
                             icon_value=icons.getIconId("set_space_16"))
 
+        row = layout.row()
+        row.prop(context.scene, "KEY_stream")
+        if context.scene.KEY_stream == True:
+            row = layout.row(align=True)
+            row.prop(context.scene, "KEY_stream_window")
+            row.prop(context.scene, "KEY_stream_cache")
+
         row = layout.row()
         box = row.box()
 
@@ -204,19 +224,28 @@ class ModeTracker:
 
 
 def on_depsgraph_update(scene, mode_tracker):
+    if actions.isRenderMode():
+        return
     if bpy.context.object:
         current_mode = bpy.context.object.mode
+        if current_mode == 'OBJECT':
+            # object mode operators write into the data directly, shared frames get a copy first
+            actions.setSelectedTmp(bpy.context)
         if current_mode != mode_tracker.previous_mode:
+            if current_mode in actions.EDIT_MODES and bpy.context.object.get("key_id") is not None:
+                # make the editable tmp copy once the mode switch has finished
+                bpy.app.timers.register(actions.onEditStart)
             if bpy.context.window_manager.KEY_state != 'ANIMALL':
-                if mode_tracker.previous_mode == 'EDIT' and bpy.context.active_object and scene.frame_current == mode_tracker.frame:
+                if mode_tracker.previous_mode in actions.EDIT_MODES and bpy.context.active_object and scene.frame_current == mode_tracker.frame:
                     print(current_mode, mode_tracker.previous_mode,
                           'updating data block')
                     obj = bpy.context.active_object
                     if obj.get("key_id"):
-                        strFrame = obj.get("key_object")
-                        objFrame = actions.getObject(strFrame)
+                        objFrame = actions.getDisplayedFrame(obj)
                         objTmp = actions.getTmp(obj)
-                        actions.setDataBlock(objFrame, objTmp)
+                        if objFrame is not None and obj.data == objTmp.data and actions.getDataSum(objTmp) != actions.getDataSum(objFrame):
+                            actions.setGeometryClean(obj)
+                            actions.setDataBlock(objFrame, objTmp)
             mode_tracker.previous_mode = current_mode
             mode_tracker.frame = scene.frame_current
 
@@ -246,6 +275,19 @@ def register():
     bpy.app.handlers.depsgraph_update_pre.append(
         lambda scene: on_depsgraph_update(scene, mode_tracker))
     bpy.app.handlers.load_post.append(onFrame_handler)
+    bpy.app.handlers.load_post.append(actions.onRegistryReset)
+    bpy.app.handlers.undo_post.append(actions.onRegistryReset)
+    bpy.app.handlers.redo_post.append(actions.onRegistryReset)
+    bpy.app.handlers.depsgraph_update_post.append(actions.onDepsgraphUpdate)
+    bpy.app.handlers.render_init.append(actions.onRenderStart)
+    bpy.app.handlers.render_pre.append(actions.onRenderStart)
+    bpy.app.handlers.render_complete.append(actions.onRenderStop)
+    bpy.app.handlers.render_cancel.append(actions.onRenderStop)
+    bpy.app.handlers.render_post.append(actions.onRenderStop)
+    bpy.app.handlers.load_post.append(actions.onRenderStop)
+    bpy.app.handlers.save_pre.append(stream.onSave)
+    bpy.app.handlers.save_post.append(stream.onSavePost)
+    bpy.app.handlers.load_post.append(stream.onLoad)
     bpy.app.handlers.frame_change_post.clear()
     bpy.app.handlers.frame_change_post.append(actions.onFrame)
     bpy.app.handlers.frame_change_pre.clear()
@@ -263,6 +305,20 @@ def unregister():
         bpy.utils.unregister_class(i)
     bpy.app.handlers.depsgraph_update_pre.clear()
     bpy.app.handlers.load_post.remove(onFrame_handler)
+    bpy.app.handlers.load_post.remove(actions.onRegistryReset)
+    bpy.app.handlers.undo_post.remove(actions.onRegistryReset)
+    bpy.app.handlers.redo_post.remove(actions.onRegistryReset)
+    bpy.app.handlers.depsgraph_update_post.remove(actions.onDepsgraphUpdate)
+    bpy.app.handlers.render_init.remove(actions.onRenderStart)
+    bpy.app.handlers.render_pre.remove(actions.onRenderStart)
+    bpy.app.handlers.render_complete.remove(actions.onRenderStop)
+    bpy.app.handlers.render_cancel.remove(actions.onRenderStop)
+    bpy.app.handlers.render_post.remove(actions.onRenderStop)
+    bpy.app.handlers.load_post.remove(actions.onRenderStop)
+    bpy.app.handlers.save_pre.remove(stream.onSave)
+    bpy.app.handlers.save_post.remove(stream.onSavePost)
+    bpy.app.handlers.load_post.remove(stream.onLoad)
+    stream.restoreAll()
     bpy.app.handlers.frame_change_post.clear()
     bpy.app.handlers.frame_change_pre.clear()
     # Remove the hotkey
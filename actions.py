@@ -1,29 +1,421 @@
 import bpy
-import hashlib
+import bisect
+import time
+from bpy.app.handlers import persistent
 from . import config
+from . import fingerprint
 from . import keyframes
+from . import storage
+from . import stream
+
+#### || FRAME REGISTRY ||####
+# frame identity lives in custom properties, key_id plus key_frame_id on frame objects and key_tmp on tmp objects
+# frame objects by (key_id, key_frame_id), tmp objects by key_id and every object by name_full
+# built in one pass over bpy.data.objects and kept up to date as frames are created, renamed or removed
+dicFrameObjects = {}
+dicTmpObjects = {}
+dicObjects = {}
+# pointers of every object seen by the registry, objects added without passing through it trigger a rebuild
+setRegistered = set()
+objRegistry = {'built': False}
+
+
+def getFrameKey(strName):
+    # Stop_{key_id}_{key_object_id} or Stop_{key_id}_tmp, files from before key_frame_id only have the name
+    arrName = strName.split('_')
+    if len(arrName) == 3 and arrName[0] == config.PREFIX and arrName[1].isdigit():
+        if arrName[2] == 'tmp':
+            return (int(arrName[1]), 'tmp')
+        if arrName[2].isdigit():
+            return (int(arrName[1]), int(arrName[2]))
+    return None
 
 
-def getNextSwapId():
-    intIndex = 0
+def getObjectKey(obj):
+    # (key_id, key_frame_id) for frame objects, (key_id, 'tmp') for tmp objects, None for anything else
+    intSwapId = obj.get("key_id")
+    if intSwapId is None:
+        return None
+    if obj.get("key_tmp") is not None:
+        return (intSwapId, 'tmp')
+    intSwapObjectId = obj.get("key_frame_id")
+    if intSwapObjectId is not None:
+        return (intSwapId, intSwapObjectId)
+    return None
+
+
+def getRegistryKey(obj):
+    # linked frames from older files can't be migrated and keep their name based identity
+    return getObjectKey(obj) or getFrameKey(obj.name)
+
+
+def isFrameObject(obj):
+    return getRegistryKey(obj) is not None
+
+
+def setObjectKey(obj, intSwapId, intSwapObjectId):
+    unregisterObject(obj)
+    obj["key_id"] = intSwapId
+    if intSwapObjectId == 'tmp':
+        obj["key_tmp"] = True
+    else:
+        obj["key_frame_id"] = intSwapObjectId
+    registerObject(obj)
+
+
+def clearObjectKey(obj):
+    # the frame becomes a regular object
+    unregisterObject(obj)
+    for strProp in ("key_frame_id", "key_tmp"):
+        if strProp in obj:
+            del obj[strProp]
+
+
+def migrateObject(obj):
+    # frames named by older versions get their identity written once, linked ones are read from the name every time
+    arrKey = getFrameKey(obj.name)
+    if arrKey is not None and obj.library is None:
+        try:
+            obj["key_id"] = arrKey[0]
+            if arrKey[1] == 'tmp':
+                obj["key_tmp"] = True
+            else:
+                obj["key_frame_id"] = arrKey[1]
+        except AttributeError:
+            # not writable from this context, the next registry build will try again
+            pass
+    return arrKey
+
+
+def registerObject(obj):
+    dicObjects[obj.name_full] = obj
+    setRegistered.add(obj.as_pointer())
+    arrKey = getObjectKey(obj)
+    if arrKey is None:
+        arrKey = migrateObject(obj)
+    if arrKey is not None:
+        intSwapId, intSwapObjectId = arrKey
+        setCountersUsed(intSwapId, intSwapObjectId)
+        if intSwapObjectId == 'tmp':
+            dicIndex = dicTmpObjects
+            arrKey = intSwapId
+        else:
+            dicIndex = dicFrameObjects
+        objExisting = dicIndex.get(arrKey)
+        if objExisting is None or not isValidObject(objExisting) or getRegistryKey(objExisting) != getRegistryKey(obj):
+            dicIndex[arrKey] = obj
+        elif objExisting.library is not None and obj.library is None:
+            # local objects win over objects linked from libraries
+            dicIndex[arrKey] = obj
+        elif objExisting.library == obj.library and obj.name == getSwapObjectName(intSwapId, intSwapObjectId) and objExisting.name != obj.name:
+            # duplicates with a .001 suffix don't replace the original
+            dicIndex[arrKey] = obj
+
+
+def unregisterObject(obj, removed=False):
+    # removed, the object is about to be deleted from the file, not only losing its key or name
+    if removed == True:
+        setRegistered.discard(obj.as_pointer())
+    strName = obj.name_full
+    if dicObjects.get(strName) == obj:
+        del dicObjects[strName]
+    arrKey = getRegistryKey(obj)
+    if arrKey is not None:
+        intSwapId, intSwapObjectId = arrKey
+        if intSwapObjectId == 'tmp':
+            if dicTmpObjects.get(intSwapId) == obj:
+                del dicTmpObjects[intSwapId]
+        elif dicFrameObjects.get(arrKey) == obj:
+            del dicFrameObjects[arrKey]
+
+
+def buildRegistry(force=False):
+    if objRegistry['built'] == True and force == False:
+        return
+    clearRegistry()
+    for obj in bpy.data.objects:
+        registerObject(obj)
+    objRegistry['built'] = True
+
+
+def clearRegistry():
+    dicFrameObjects.clear()
+    dicTmpObjects.clear()
+    dicObjects.clear()
+    setRegistered.clear()
+    objRegistry['built'] = False
+
+
+def isValidObject(obj, strName=None):
+    # python references go stale when blender removes or renames the object
+    try:
+        return strName is None or obj.name_full == strName
+    except ReferenceError:
+        return False
+
+
+def getIndexedObject(dicIndex, arrIndex, arrKey):
+    # arrIndex is the key in dicIndex, arrKey the object key it must still carry
+    buildRegistry()
+    obj = dicIndex.get(arrIndex)
+    if obj is not None:
+        if isValidObject(obj) and getRegistryKey(obj) == arrKey:
+            return obj
+        del dicIndex[arrIndex]
+    # not indexed yet, an older frame renamed into place
+    obj = getObject(getSwapObjectName(*arrKey))
+    if obj is not None and getRegistryKey(obj) == arrKey:
+        return obj
+    # objects appended, linked or duplicated since the last build, registered in one pass
+    if len(bpy.data.objects) != len(setRegistered):
+        buildRegistry(True)
+        obj = dicIndex.get(arrIndex)
+        if obj is not None and getRegistryKey(obj) == arrKey:
+            return obj
+    return None
+
+
+#### || SWAP OBJECTS ||####
+# per scene, the objects carrying key_id so the frame handlers can skip lights, cameras and props
+dicSwapObjects = {}
+
+
+def getSwapObjects(scene):
+    intScene = scene.as_pointer()
+    intCount = len(scene.objects)
+    objMembers = dicSwapObjects.get(intScene)
+    if objMembers is not None and objMembers['count'] == intCount:
+        try:
+            for obj in objMembers['objects']:
+                obj.name
+            return objMembers['objects']
+        except ReferenceError:
+            pass
+    arrObjects = []
+    for obj in scene.objects:
+        if obj.get("key_id") is not None and not isFrameObject(obj):
+            arrObjects.append(obj)
+    dicSwapObjects[intScene] = {'count': intCount, 'objects': arrObjects}
+    return arrObjects
+
+
+def setSwapObjectsDirty():
+    dicSwapObjects.clear()
+
+
+def isSwapObject(scene, obj):
+    objMembers = dicSwapObjects.get(scene.as_pointer())
+    return objMembers is not None and obj in objMembers['objects']
+
+
+#### || SWAP PLANNER ||####
+# resolved key per swap object from the last frame change, with the range of frames it holds for
+dicSwapStates = {}
+
+
+def getSwapPlan(scene):
+    # only the objects whose frame object changes since the last frame, holds cost a range check
+    arrPlan = []
+    intFrame = scene.frame_current
+    for obj in getSwapObjects(scene):
+        intPointer = obj.as_pointer()
+        objState = dicSwapStates.get(intPointer)
+        if objState is not None and keyframes.dicTimelines.get(objState['fcurve']) is objState['timeline'] and objState['start'] <= intFrame < objState['end'] and getDisplayedKey(obj) == objState['frame']:
+            continue
+        objFCurve = keyframes.getFCurveByPath(obj, '["key_object_id"]', False)
+        if objFCurve is None:
+            dicSwapStates.pop(intPointer, None)
+            continue
+        objTimeline = keyframes.getTimeline(objFCurve)
+        intObjectId, fltStart, fltEnd = keyframes.getTimelineHold(
+            objTimeline, intFrame)
+        if intObjectId is None:
+            dicSwapStates.pop(intPointer, None)
+            continue
+        objFrame = getFrameObject(obj, intObjectId)
+        if objFrame is None:
+            dicSwapStates.pop(intPointer, None)
+            continue
+        dicSwapStates[intPointer] = {
+            'fcurve': objFCurve.as_pointer(),
+            'timeline': objTimeline,
+            'start': fltStart,
+            'end': fltEnd,
+            'frame': getRegistryKey(objFrame),
+        }
+        if getDisplayedKey(obj) != getRegistryKey(objFrame):
+            arrPlan.append((obj, objFrame))
+    return arrPlan
+
+
+def setSwapPlanDirty(obj=None):
+    if obj is None:
+        dicSwapStates.clear()
+    else:
+        dicSwapStates.pop(obj.as_pointer(), None)
+
+
+@persistent
+def onRegistryReset(*args):
+    # undo and file loads reallocate datablocks, drop every cached reference
+    clearRegistry()
+    setSwapObjectsDirty()
+    setSwapPlanDirty()
+    setMaterialSignatureDirty()
+    setDirtyGeometry.clear()
+    fingerprint.setFingerprintDirty()
+    setDedupIndexDirty()
+    storage.clearCache()
+    stream.clearCache()
+    dicLiveData.clear()
+    setLiveWrites.clear()
+    setCountersDirty()
+    keyframes.setTimelineDirty()
+    keyframes.setFCurveIndexDirty()
+
+
+#### || RENDER MODE ||####
+# renders and command line sessions only need the data swap, no modes, tmp objects or redraws
+objRender = {'active': False}
+
+
+def isRenderMode():
+    return objRender['active'] or bpy.app.background
+
+
+@persistent
+def onRenderStart(*args):
+    objRender['active'] = True
+
+
+@persistent
+def onRenderStop(*args):
+    # also on render_post and load_post, a render that ends without complete or cancel must not leave the flag set
+    # animation renders set it again in render_pre before the next frame changes
+    objRender['active'] = False
+
+
+def onFrameRender(scene):
+    for obj, objFrame in getSwapPlan(scene):
+        swapFrame(obj, objFrame)
+        swapMaterials(objFrame, obj)
+        keyframes.copyDataKeyframes(
+            objFrame, obj, '["key_object_id"]')
+
+
+#### || GEOMETRY DIRTY TRACKING ||####
+# objects and datablocks with a depsgraph geometry update since their last commit to the frame object
+setDirtyGeometry = set()
+
+
+def isGeometryDirty(obj):
+    return obj.as_pointer() in setDirtyGeometry or obj.data.as_pointer() in setDirtyGeometry
+
+
+def setGeometryClean(obj):
+    setDirtyGeometry.discard(obj.as_pointer())
+    setDirtyGeometry.discard(obj.data.as_pointer())
+
+
+@persistent
+def onDepsgraphUpdate(scene, depsgraph):
+    # positions written by an in place swap leave the topology as it was, object and mesh both report it
+    setWritten = set(setLiveWrites)
+    setLiveWrites.clear()
+    for update in depsgraph.updates:
+        if update.is_updated_geometry:
+            objID = update.id.original
+            setDirtyGeometry.add(objID.as_pointer())
+            if isinstance(objID, bpy.types.Object):
+                objID = objID.data
+            if objID is not None:
+                fingerprint.setFingerprintDirty(
+                    objID, topology=objID.as_pointer() not in setWritten)
+        if isinstance(update.id, bpy.types.Action):
+            # keys edited in the dopesheet or graph editor
+            keyframes.setTimelineDirty(
+                intAction=update.id.original.as_pointer())
+            keyframes.setFCurveIndexDirty(update.id.original.as_pointer())
+        elif isinstance(update.id, bpy.types.Object):
+            # key_id added or removed by hand in the custom properties panel
+            obj = update.id.original
+            if objRegistry['built'] == True and obj.get("key_id") is not None and dicObjects.get(obj.name_full) != obj:
+                # frames appended, linked or duplicated into the scene
+                registerObject(obj)
+            if (obj.get("key_id") is not None) != isSwapObject(scene, obj):
+                setSwapObjectsDirty()
+            setMaterialSignatureDirty(obj)
+
+
+#### || ID COUNTERS ||####
+# next key_id of the file and next key_object_id per key_id, so new groups and frames don't scan every object
+# stored on the scene as key_next_id and key_next_object_ids, reconciled with the objects once per load or undo
+objCounters = {'reconciled': False, 'key_id': 1, 'frames': {}}
+
+
+def reconcileCounters():
+    if objCounters['reconciled'] == True:
+        return
+    buildRegistry()
+    intNext = 1
+    dicFrames = {}
+    for scene in bpy.data.scenes:
+        intNext = max(intNext, scene.get("key_next_id", 1))
+        for strSwapId, intSwapObjectId in scene.get("key_next_object_ids", {}).items():
+            dicFrames[int(strSwapId)] = max(
+                dicFrames.get(int(strSwapId), 0), intSwapObjectId)
     for obj in bpy.data.objects:
         intId = obj.get("key_id")
-        if intId is not None and intId > intIndex:
-            intIndex = intId
-    return intIndex+1
+        if intId is not None and intId >= intNext:
+            intNext = intId + 1
+    for intSwapId, intSwapObjectId in dicFrameObjects.keys():
+        if intSwapObjectId >= dicFrames.get(intSwapId, 0):
+            dicFrames[intSwapId] = intSwapObjectId + 1
+    objCounters['key_id'] = intNext
+    objCounters['frames'] = dicFrames
+    objCounters['reconciled'] = True
+
+
+def setCounters(intSwapId=None):
+    scene = bpy.context.scene
+    if scene is None or scene.library is not None:
+        return
+    scene["key_next_id"] = objCounters['key_id']
+    if intSwapId is not None:
+        if scene.get("key_next_object_ids") is None:
+            scene["key_next_object_ids"] = {}
+        scene["key_next_object_ids"][str(intSwapId)] = objCounters['frames'][intSwapId]
+
+
+def setCountersUsed(intSwapId, intSwapObjectId):
+    # frames copied, appended or renamed into place never get their ids handed out again
+    if objCounters['reconciled'] == False:
+        return
+    if intSwapId >= objCounters['key_id']:
+        objCounters['key_id'] = intSwapId + 1
+    if intSwapObjectId != 'tmp' and intSwapObjectId >= objCounters['frames'].get(intSwapId, 0):
+        objCounters['frames'][intSwapId] = intSwapObjectId + 1
+
+
+def setCountersDirty():
+    objCounters['reconciled'] = False
+
+
+def getNextSwapId():
+    reconcileCounters()
+    intSwapId = objCounters['key_id']
+    objCounters['key_id'] = intSwapId + 1
+    setCounters()
+    return intSwapId
 
 
 def getNextSwapObjectId(obj):
-    # changing to method where we look at all objects in file and thjeri properties and get a new max
-    # intSwapObjectId = keyframes.getKeyframeValue(obj, '["key_object_id"]', 0, 'max')
-    intSwapObjectId = 0
+    # every call hands out a new id, ids of removed frames are not reused
+    reconcileCounters()
     intSwapId = getSwapId(obj)
-    for objAll in bpy.data.objects:
-        if objAll.get("key_id") is not None and objAll.get("key_id") == intSwapId and f'{config.PREFIX}_{intSwapId}_' in objAll.name:
-            # now we know this is a frame object for the object we are looking at
-            arrName = objAll.name.split('_')
-            if arrName[2] != 'tmp' and int(arrName[2]) >= intSwapObjectId:
-                intSwapObjectId = int(arrName[2])+1
+    intSwapObjectId = objCounters['frames'].get(intSwapId, 0)
+    objCounters['frames'][intSwapId] = intSwapObjectId + 1
+    setCounters(intSwapId)
     return intSwapObjectId
 
 
@@ -35,13 +427,18 @@ def setSwapKey(obj, intObjectId, intFrame, update=True):
         obj, strPath, False)
     if objFCurve == None:
         obj.keyframe_insert(data_path=strPath, frame=intFrame)
+        objFCurve = keyframes.getFCurveByPath(
+            obj, strPath, False)
+        if objFCurve != None:
+            arrX, arrY, arrSelect = keyframes.getKeyframeArrays(objFCurve)
+            intIndex = keyframes.getPointIndex(arrX, intFrame)
+            if intIndex is not None:
+                keyframes.setKeyframeStyle(
+                    objFCurve.keyframe_points[intIndex], 'CONSTANT', 'BREAKDOWN')
     else:
-        objFCurve.keyframe_points.insert(
-            frame=intFrame, value=intObjectId)
-        for keyframe_point in objFCurve.keyframe_points:
-            keyframe_point.interpolation = 'CONSTANT'
-    keyframes.setKeyType(obj, strPath, intFrame,
-                         'BREAKDOWN', inDataBlock=False)
+        # only the new point gets its interpolation, the rest of the curve is left alone
+        keyframes.insertKeyframePoint(
+            objFCurve, intFrame, intObjectId, 'CONSTANT', 'BREAKDOWN')
 
 
 def getSwapObjectName(intSwapId, intSwapObjectId):
@@ -52,16 +449,25 @@ def getSwapObjectName(intSwapId, intSwapObjectId):
 
 
 def getObject(strName):
-    for obj in bpy.data.objects:
-        if obj.name_full == strName:
+    if strName is None:
+        return None
+    buildRegistry()
+    obj = dicObjects.get(strName)
+    if obj is not None:
+        if isValidObject(obj, strName):
             return obj
+        del dicObjects[strName]
+    obj = bpy.data.objects.get(strName)
+    if obj is not None and isValidObject(obj, strName):
+        registerObject(obj)
+        return obj
     return None
 
 
 def getObjectCopy(obj):
     if obj is not None:
         objNew = obj.copy()
-        objNew.data = obj.data.copy()
+        objNew.data = stream.setResident(obj.data).copy()
         if obj.animation_data is not None and obj.animation_data.action is not None:
             objNew.animation_data.action = obj.animation_data.action.copy()
         if obj.data.animation_data is not None and obj.data.animation_data.action is not None:
@@ -72,29 +478,163 @@ def getObjectCopy(obj):
 def swapData(objTarget, objReference, updateProp=True, copy=False):
     if objTarget and objReference:
         if copy == True:
-            objTarget.data = objReference.data.copy()
+            objTarget.data = storage.getFrameData(objReference).copy()
             keyframes.copyDataKeyframes(
                 objReference, objTarget, '["key_object_id"]')
         else:
-            objTarget.data = objReference.data
+            objTarget.data = storage.getFrameData(objReference)
         if updateProp == True:
-            objTarget["key_object"] = objReference.name_full
+            setDisplayedFrame(objTarget, objReference)
+
+
+#### || IN PLACE SWAP ||####
+# groups with key_inplace keep one live mesh on the visible object and only write the shown frame's vertex positions
+# uvs and materials are part of the topology so they already match, normals are recalculated by update
+# frames with another topology fall back to swapping the datablock
+dicLiveData = {}
+# live meshes whose positions were written by a swap, their next depsgraph update keeps the topology digest
+setLiveWrites = set()
+
+
+def isInPlace(obj):
+    return obj.get("key_inplace") == True and obj.type == 'MESH'
+
+
+def isLiveData(objData):
+    return objData is not None and objData.get("key_live") is not None
+
+
+def getLiveData(obj, objFrame):
+    # the owner's live mesh, a copy of the first frame shown in place
+    objLive = obj.data if isLiveData(obj.data) else dicLiveData.get(obj.as_pointer())
+    try:
+        if objLive is not None and objLive.get("key_live") == obj.get("key_id"):
+            dicLiveData[obj.as_pointer()] = objLive
+            return objLive
+    except ReferenceError:
+        pass
+    objLive = storage.getFrameData(objFrame).copy()
+    objLive.name = f'{config.PREFIX}_{obj.get("key_id")}_live'
+    objLive.use_fake_user = False
+    for strProp in ("key_delta_display", "key_delta_base", "key_delta_frame"):
+        if strProp in objLive:
+            del objLive[strProp]
+    objLive["key_live"] = obj.get("key_id")
+    dicLiveData[obj.as_pointer()] = objLive
+    return objLive
+
+
+def setFrameCoords(obj, objFrame):
+    # write objFrame's positions into the owner's live mesh, False when the topology differs
+    objFrameData = objFrame.data
+    if not isinstance(objFrameData, bpy.types.Mesh):
+        return False
+    objLive = getLiveData(obj, objFrame)
+    if fingerprint.getCachedTopology(objLive) != fingerprint.getCachedTopology(stream.setResident(objFrameData, objFrame)):
+        return False
+    objLive.vertices.foreach_set('co', storage.getFrameCoords(objFrame))
+    objLive.update()
+    fingerprint.setFingerprintDirty(objLive, topology=False)
+    setLiveWrites.add(objLive.as_pointer())
+    if obj.data != objLive:
+        obj.data = objLive
+    return True
+
+
+def swapFrame(obj, objFrame):
+    # show objFrame on its swap object
+    if isInPlace(obj) and setFrameCoords(obj, objFrame):
+        setDisplayedFrame(obj, objFrame)
+    else:
+        swapData(obj, objFrame)
+
+
+def setInPlace(obj, inPlace):
+    if obj.get("key_id") is None:
+        return
+    obj["key_inplace"] = inPlace
+    if inPlace == False:
+        dicLiveData.pop(obj.as_pointer(), None)
+    setSwapPlanDirty(obj)
+
+
+def benchmarkSwap(context, obj):
+    # time showing every frame of obj's keys with datablock swaps and with in place updates
+    objFCurve = keyframes.getFCurveByPath(obj, '["key_object_id"]', False)
+    if objFCurve is None:
+        return None
+    arrFrames = []
+    for fltValue in keyframes.getTimeline(objFCurve)['values']:
+        objFrame = getFrameObject(obj, int(fltValue))
+        if objFrame is not None and objFrame not in arrFrames:
+            arrFrames.append(objFrame)
+    if len(arrFrames) == 0:
+        return None
+    objCurrent = getDisplayedFrame(obj)
+    isCurrent = obj.get("key_inplace", False)
+    objReport = {'frames': len(arrFrames)}
+    for strMode, inPlace in (('data', False), ('inplace', True)):
+        obj["key_inplace"] = inPlace
+        fltStart = time.perf_counter()
+        for objFrame in arrFrames:
+            swapFrame(obj, objFrame)
+            # the depsgraph evaluation is where datablock swaps pay for relations and batches
+            context.view_layer.update()
+        objReport[strMode] = (time.perf_counter() -
+                              fltStart) * 1000 / len(arrFrames)
+    obj["key_inplace"] = isCurrent
+    if objCurrent is not None:
+        swapFrame(obj, objCurrent)
+    setSwapPlanDirty(obj)
+    return objReport
 
 
 def getFrameObject(obj, intObjectId):
     if intObjectId is not None:
-        strSwapObject = getSwapObjectName(obj.get("key_id"), intObjectId)
-        objFrame = getObject(strSwapObject)
+        intSwapId = obj.get("key_id")
+        objFrame = getIndexedObject(
+            dicFrameObjects, (intSwapId, intObjectId), (intSwapId, intObjectId))
         if objFrame is not None:
             return objFrame
     return None
 
 
+def getTmpObject(intSwapId):
+    return getIndexedObject(dicTmpObjects, intSwapId, (intSwapId, 'tmp'))
+
+
+def getDisplayedKey(obj):
+    # (key_id, key_frame_id) of the frame a swap object shows, key_object keeps its name for the ui and older files
+    arrKey = obj.get("key_frame")
+    if arrKey is None:
+        return None
+    return tuple(arrKey)
+
+
+def getDisplayedFrame(obj):
+    arrKey = getDisplayedKey(obj)
+    if arrKey is not None:
+        return getIndexedObject(dicFrameObjects, arrKey, arrKey)
+    # files from before key_frame only have the name
+    objFrame = getObject(obj.get("key_object"))
+    if objFrame is not None and isFrameObject(objFrame):
+        return objFrame
+    return None
+
+
+def setDisplayedFrame(obj, objFrame):
+    obj["key_object"] = objFrame.name_full
+    arrKey = getRegistryKey(objFrame)
+    if arrKey is not None and arrKey[1] != 'tmp':
+        obj["key_frame"] = arrKey
+    elif "key_frame" in obj:
+        del obj["key_frame"]
+
+
 def getTmp(objTarget):
     intSwapId = objTarget.get("key_id")
     if intSwapId is not None:
-        strTmp = f'{config.PREFIX}_{intSwapId}_tmp'
-        objTmp = getObject(strTmp)
+        objTmp = getTmpObject(intSwapId)
         if objTmp is not None:
             return objTmp
         else:
@@ -104,17 +644,154 @@ def getTmp(objTarget):
 def setDataBlock(objTarget, objReference):
     objDataBlock = objTarget.data
     swapData(objTarget, objReference, updateProp=False, copy=True)
-    if objTarget.type == 'CURVE':
+    storage.setFullFrame(objTarget)
+    setDisplayedData(objTarget, objDataBlock)
+    removeDataBlock(objDataBlock)
+
+
+def setDisplayedData(objFrame, objDataBlock):
+    # swap objects displaying the frame's old datablock directly follow it to the new one
+    for obj in getSwapObjects(bpy.context.scene):
+        if obj.data == objDataBlock and getDisplayedKey(obj) == getRegistryKey(objFrame):
+            obj.data = objFrame.data
+
+
+def setUniqueData(obj):
+    # frame datablocks can be shared, copy before anything writes to them in place
+    objData = obj.data
+    if objData is not None and objData.users > 1 + int(objData.use_fake_user):
+        obj.data = objData.copy()
+        obj.data.use_fake_user = objData.use_fake_user
+
+
+def removeDataBlock(objDataBlock):
+    fingerprint.setFingerprintDirty(objDataBlock)
+    if objDataBlock.users > int(objDataBlock.use_fake_user):
+        # still in use somewhere else, leave it to blender's orphan purge
+        objDataBlock.use_fake_user = False
+    elif isinstance(objDataBlock, bpy.types.Curve):
         bpy.data.curves.remove(objDataBlock)
-    elif objTarget.type == 'MESH':
+    elif isinstance(objDataBlock, bpy.types.Mesh):
         bpy.data.meshes.remove(objDataBlock)
+    elif isinstance(objDataBlock, bpy.types.MetaBall):
+        bpy.data.metaballs.remove(objDataBlock)
+
+
+#### || FRAME DEDUPLICATION ||####
+# frames with identical geometry, materials and data action share one datablock, indexed by content
+dicSharedData = {}
+objDedupIndex = {'built': False}
+
+
+def getDedupKey(objFrame):
+    objData = objFrame.data
+    if storage.isDeltaFrame(objFrame) or stream.isOffloaded(objData):
+        return None
+    if objData is None or objData.library is not None or getattr(objData, 'shape_keys', None) is not None:
+        return None
+    # vertex weights and custom normals aren't part of the fingerprint, those frames keep their own datablock
+    if len(objFrame.vertex_groups) > 0 or getattr(objData, 'has_custom_normals', False):
+        return None
+    strFingerprint = fingerprint.getCachedFingerprint(objData)
+    if strFingerprint is None:
+        return None
+    arrMaterials = tuple(
+        objMaterial.name_full if objMaterial else '' for objMaterial in objData.materials)
+    strAction = ''
+    if objData.animation_data is not None and objData.animation_data.action is not None:
+        strAction = objData.animation_data.action.name_full
+    return (type(objData).__name__, strFingerprint, arrMaterials, strAction)
+
+
+def getSharedData(arrKey):
+    objData = dicSharedData.get(arrKey)
+    if objData is not None:
+        try:
+            if fingerprint.getCachedFingerprint(objData) == arrKey[1]:
+                return objData
+        except ReferenceError:
+            pass
+        del dicSharedData[arrKey]
+    return None
+
+
+def buildDedupIndex():
+    if objDedupIndex['built'] == True:
+        return
+    buildRegistry()
+    dicSharedData.clear()
+    for objFrame in list(dicFrameObjects.values()):
+        if isValidObject(objFrame):
+            arrKey = getDedupKey(objFrame)
+            if arrKey is not None and arrKey not in dicSharedData:
+                dicSharedData[arrKey] = objFrame.data
+    objDedupIndex['built'] = True
+
+
+def setDedupIndexDirty():
+    dicSharedData.clear()
+    objDedupIndex['built'] = False
+
+
+def setSharedData(objFrame):
+    # point a new or updated frame at an identical existing datablock, returns the datablock no longer used
+    arrKey = getDedupKey(objFrame)
+    if arrKey is None:
+        return None
+    buildDedupIndex()
+    objShared = getSharedData(arrKey)
+    if objShared is None:
+        dicSharedData[arrKey] = objFrame.data
+        return None
+    if objShared == objFrame.data:
+        return None
+    objDataBlock = objFrame.data
+    objFrame.data = objShared
+    setDisplayedData(objFrame, objDataBlock)
+    return objDataBlock
+
+
+def getDataSize(objData):
+    # rough in memory and on disk footprint in bytes, for reports
+    if isinstance(objData, bpy.types.Mesh):
+        return len(objData.vertices)*12 + len(objData.edges)*8 + len(objData.polygons)*8 + len(objData.loops)*(8 + 8*len(objData.uv_layers))
+    elif isinstance(objData, bpy.types.TextCurve):
+        return len(objData.body)*4
+    elif isinstance(objData, bpy.types.Curve):
+        return sum(len(spline.bezier_points)*40 + len(spline.points)*24 for spline in objData.splines)
+    elif isinstance(objData, bpy.types.MetaBall):
+        return len(objData.elements)*48
+    return 0
+
+
+def dedupFrames():
+    # bulk pass over every frame object in the file
+    objReport = {'frames': 0, 'merged': 0, 'bytes': 0}
+    buildRegistry()
+    setDedupIndexDirty()
+    arrRemove = []
+    for objFrame in list(dicFrameObjects.values()):
+        if not isValidObject(objFrame) or objFrame.library is not None:
+            continue
+        objReport['frames'] += 1
+        objDataBlock = setSharedData(objFrame)
+        if objDataBlock is not None and objDataBlock.users <= int(objDataBlock.use_fake_user) and objDataBlock not in arrRemove:
+            objReport['merged'] += 1
+            objReport['bytes'] += getDataSize(objDataBlock)
+            fingerprint.setFingerprintDirty(objDataBlock)
+            arrRemove.append(objDataBlock)
+    objDedupIndex['built'] = True
+    if len(arrRemove) > 0:
+        bpy.data.batch_remove(arrRemove)
+    return objReport
 
 
 def setTmp(obj, forceNew=False):
     intSwapId = obj.get("key_id")
     strTmp = f'{config.PREFIX}_{intSwapId}_tmp'
-    objTmp = getObject(strTmp)
+    objTmp = getTmpObject(intSwapId)
     if forceNew == True and objTmp is not None:
+        unregisterObject(objTmp, True)
         bpy.data.objects.remove(objTmp, do_unlink=True)
         objTmp = None
     if objTmp is not None:
@@ -123,82 +800,142 @@ def setTmp(obj, forceNew=False):
         objTmp = bpy.data.objects.new(strTmp, obj.data.copy())
         objTmp.data.use_fake_user = True
         objTmp.use_fake_user = True
-        objTmp["key_id"] = intSwapId
+        setObjectKey(objTmp, intSwapId, 'tmp')
     return objTmp
 
 
+# modes that write into the object's data, a swap object gets its tmp copy as soon as it enters one
+EDIT_MODES = {'EDIT', 'SCULPT', 'VERTEX_PAINT', 'WEIGHT_PAINT', 'TEXTURE_PAINT'}
+
+
+def isSharedData(objData):
+    # shown by more than the one frame object and the swap object, see setSharedData
+    return objData.users > 2 + int(objData.use_fake_user)
+
+
+def setSelectedTmp(context):
+    # object mode operators (shade smooth, set origin..) write into the selected objects' data right away
+    # a datablock shared by several frames is swapped for the tmp copy first, unique ones are the frame's own to edit
+    for obj in context.selected_objects:
+        if obj.mode == 'OBJECT' and obj.get("key_id") is not None and not isFrameObject(obj) and isSharedData(obj.data) and isFrameData(obj):
+            setEditTmp(obj)
+
+
+def isTmpData(obj):
+    objTmp = getTmpObject(obj.get("key_id"))
+    return objTmp is not None and obj.data == objTmp.data
+
+
+def isDisplayedFrame(obj, objFrame):
+    # the frame datablock itself, a rebuilt delta frame or the in place live mesh
+    return obj.data == objFrame.data or storage.isDisplayData(obj.data) or isLiveData(obj.data)
+
+
+def isFrameData(obj):
+    # copy on write, playback displays the frame datablock itself until the object is edited
+    objFrame = getDisplayedFrame(obj)
+    return objFrame is not None and isDisplayedFrame(obj, objFrame)
+
+
+def setEditTmp(obj):
+    # make the editable tmp copy of the current frame, only needed once the object is edited
+    objFrame = getDisplayedFrame(obj)
+    if objFrame is None or not isDisplayedFrame(obj, objFrame):
+        return getTmp(obj)
+    objTmp = setTmp(objFrame)
+    swapData(obj, objTmp, False)
+    return objTmp
+
+
+def onEditStart():
+    # timer callback, swapping data is not allowed while a mesh is in edit mode
+    context = bpy.context
+    if context.object is None:
+        return None
+    strMode = context.object.mode
+    arrObjects = [obj for obj in getSwapObjects(context.scene)
+                  if obj.mode == strMode and isFrameData(obj)]
+    if len(arrObjects) > 0:
+        if strMode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        for obj in arrObjects:
+            setEditTmp(obj)
+        if strMode == 'EDIT':
+            bpy.ops.object.mode_set(mode='EDIT')
+    return None
+
+
 def getDataSum(obj):
-    # an attempt to get the cheapest data compare possible for equal or not
-    intSum = 0
+    # the cheapest data compare possible for equal or not, see fingerprint.getFingerprint
     if obj:
-        # add text, metaballs
-        if obj.type == 'FONT':
-            intSum = hash(obj.data.body)
-        elif obj.type == 'META':
-            intSum = hash(obj.data.elements)
-        elif obj.type == 'MESH':
-            arrVerts = [v for v in obj.data.vertices]
-            for vert in arrVerts:
-                intSum += vert.co.x + vert.co.y + vert.co.z
-        elif obj.type == 'CURVE':
-            intSum = hash(obj.data.splines)
-        # intSum += hash(obj.data.materials)
-        # if obj.data.animation_data and obj.data.animation_data.action:
-        #    intSum += hash(obj.data.animation_data.action.fcurves)
-        return intSum
+        return fingerprint.getCachedFingerprint(storage.getFrameData(obj))
     return None
 
 
 def onFramePre(scene):
+    if isRenderMode():
+        return
     context = bpy.context
     strMode = 'OBJECT'
-    # if context.active_object is not None:
-    strMode = context.object.mode
+    if context.object is not None:
+        strMode = context.object.mode
     # object swapping for key feature
-    if strMode == 'EDIT' or strMode == 'SCULPT':
+    if strMode in EDIT_MODES:
         # bpy.ops.object.mode_set(mode='OBJECT')
-        for obj in scene.objects:
-            obj.update_from_editmode()
-            strFrame = obj.get("key_object")
-            objFrame = getObject(strFrame)
-            objTmp = getTmp(obj)
-            if objFrame is not None and obj.get("key_object") == objFrame.name:
-                intSumTmp = getDataSum(objTmp)
-                intSumFrame = getDataSum(objFrame)
-                if intSumTmp != intSumFrame:
-                    print('frame pre', obj.name, intSumTmp, intSumFrame)
-                    setDataBlock(objFrame, objTmp)
-        # bpy.ops.object.mode_set(mode=strMode)
+        arrObjects = getattr(context, 'objects_in_mode_unique_data', None)
+        if arrObjects is None:
+            arrObjects = [obj for obj in getSwapObjects(scene)
+                          if obj.mode == strMode]
+    else:
+        # tmp copies of shared frames changed by object mode operators, see setSelectedTmp
+        arrObjects = [obj for obj in getSwapObjects(scene)
+                      if obj.data is not None and isGeometryDirty(obj) and isTmpData(obj)]
+    for obj in arrObjects:
+        # only objects that were actually edited since the last commit
+        if obj.get("key_id") is None or not isGeometryDirty(obj):
+            continue
+        setGeometryClean(obj)
+        obj.update_from_editmode()
+        objFrame = getDisplayedFrame(obj)
+        objTmp = getTmp(obj)
+        # objects still displaying the frame datablock have nothing to commit
+        if objFrame is not None and obj.data == objTmp.data:
+            intSumTmp = getDataSum(objTmp)
+            intSumFrame = getDataSum(objFrame)
+            if intSumTmp != intSumFrame:
+                print('frame pre', obj.name, intSumTmp, intSumFrame)
+                setDataBlock(objFrame, objTmp)
+    # bpy.ops.object.mode_set(mode=strMode)
 
 
 def onFrame(scene):
+    if isRenderMode():
+        onFrameRender(scene)
+        return
     context = bpy.context
+    arrEditing = []
     if hasattr(context, 'object'):
         strMode = context.object.mode
+        if strMode in EDIT_MODES:
+            arrEditing = [obj for obj in getSwapObjects(scene)
+                          if obj.mode == strMode]
         # object swapping for key feature
         if strMode == 'EDIT':
             bpy.ops.object.mode_set(mode='OBJECT')
-    for obj in scene.objects:
+    for obj, objFrame in getSwapPlan(scene):
         # obj must have an id and set an object_id it expects
         # obj must have same id as swa object and not already by the one in use
-        # intObjectId = obj.get("key_object_id")
-        # if strMode == 'EDIT':
-        # obj.update_from_editmode()
-        objTmp = getTmp(obj)
-        intObjectId = keyframes.getKeyframeValue(
-            obj, '["key_object_id"]', scene.frame_current, '<=')
-        if intObjectId is not None:
-            intObjectId = int(intObjectId)
-            objFrame = getFrameObject(obj, intObjectId)
-            if objFrame is not None and obj.get("key_object") != objFrame.name_full:
-                swapData(obj, objFrame)
-                objTmp = setTmp(objFrame)
-                swapData(obj, objTmp, False)
-                swapMaterials(objFrame, obj)
-                keyframes.copyDataKeyframes(
-                    objFrame, obj, '["key_object_id"]')
+        # playback and scrubbing display the frame datablock, only edited objects get a tmp copy
+        swapFrame(obj, objFrame)
+        if obj in arrEditing:
+            setEditTmp(obj)
+        swapMaterials(objFrame, obj)
+        keyframes.copyDataKeyframes(
+            objFrame, obj, '["key_object_id"]')
     if hasattr(context, 'object') and strMode == 'EDIT':
         bpy.ops.object.mode_set(mode='EDIT')
+    if scene.KEY_stream == True:
+        setStreamWindow(scene)
 
 
 def getSwapId(obj):
@@ -207,14 +944,15 @@ def getSwapId(obj):
     if intSwapId is None:
         intSwapId = getNextSwapId()
         obj['key_id'] = intSwapId
+        setSwapObjectsDirty()
     # set a tmp object if none exists
     strTmp = f'{config.PREFIX}_{intSwapId}_tmp'
-    objTmp = getObject(strTmp)
+    objTmp = getTmpObject(intSwapId)
     if objTmp is None:
         objTmp = bpy.data.objects.new(strTmp, obj.data.copy())
         objTmp.data.use_fake_user = True
         objTmp.use_fake_user = True
-        objTmp["key_id"] = intSwapId
+        setObjectKey(objTmp, intSwapId, 'tmp')
     return intSwapId
 
 
@@ -227,6 +965,9 @@ def getSwapObjectId(obj, intFrame):
 
 
 def removeGeo(obj):
+    setUniqueData(obj)
+    storage.setFullFrame(obj)
+    fingerprint.setFingerprintDirty(obj.data)
     if obj.type == 'CURVE' or obj.type == 'SURFACE':
         for i, spline in enumerate(obj.data.splines):
             try:
@@ -250,15 +991,20 @@ def removeGeo(obj):
             pass
 
 
-def setFrameObject(obj, strFrame, intSwapId):
-    objFrame = getObject(strFrame)
+def setFrameObject(obj, intSwapId, intSwapObjectId):
+    objFrame = getIndexedObject(
+        dicFrameObjects, (intSwapId, intSwapObjectId), (intSwapId, intSwapObjectId))
     if objFrame is None:
         # create the frame object
-        objFrame = bpy.data.objects.new(strFrame, obj.data.copy())
+        objFrame = bpy.data.objects.new(getSwapObjectName(
+            intSwapId, intSwapObjectId), obj.data.copy())
         objFrame.data.use_fake_user = True
         objFrame.use_fake_user = True
-        objFrame["key_id"] = intSwapId
+        setObjectKey(objFrame, intSwapId, intSwapObjectId)
     setDataBlock(objFrame, obj)
+    objDataBlock = setSharedData(objFrame)
+    if objDataBlock is not None:
+        removeDataBlock(objDataBlock)
     return objFrame
 
 
@@ -268,11 +1014,11 @@ def setSwapObject(context, obj, intFrame):
         obj.update_from_editmode()
     intSwapId = getSwapId(obj)
     intSwapObjectId = getSwapObjectId(obj, intFrame)
-    strFrame = getSwapObjectName(obj.get("key_id"), intSwapObjectId)
-    obj["key_object"] = strFrame
     # make sure a frame object doesn't already exist
-    objFrame = setFrameObject(obj, strFrame, intSwapId)
+    objFrame = setFrameObject(obj, intSwapId, intSwapObjectId)
+    setDisplayedFrame(obj, objFrame)
     swapMaterials(obj, objFrame)
+    setMaterialSignatureDirty(objFrame)
     setSwapKey(obj, intSwapObjectId, intFrame)
     setTmp(obj, True)
     bpy.app.handlers.frame_change_post.clear()
@@ -290,15 +1036,206 @@ def addSwapObjects(context, arrSelected, obj):
             intInsertFrame = intCurrentFrame+i
             keyframes.nudgeFrames(obj, intInsertFrame, 1)
             intSwapObjectId = getSwapObjectId(obj, intInsertFrame)
-            # get the frame object name based on the target object
-            strFrame = getSwapObjectName(obj.get("key_id"), intSwapObjectId)
+            # the frame object belongs to the target object
             # but the objects being copied are the selected ones
-            setFrameObject(objSelected, strFrame, intSwapId)
+            setFrameObject(objSelected, intSwapId, intSwapObjectId)
             # set swap key, but dont change current key, because we are nudging frames not changing frames
             setSwapKey(obj, intSwapObjectId, intInsertFrame, update=False)
 
 
+#### || DELTA FRAMES ||####
+def getGroupFrames(intSwapId):
+    buildRegistry()
+    return [objFrame for arrKey, objFrame in list(dicFrameObjects.items())
+            if arrKey[0] == intSwapId and isValidObject(objFrame) and objFrame.library is None]
+
+
+def compressFrames(obj):
+    # keep one base mesh per topology and only vertex positions per frame, see storage.py
+    intSwapId = obj.get("key_id")
+    if intSwapId is None:
+        return {'frames': 0, 'bytes': 0}
+    arrFrames = getGroupFrames(intSwapId)
+    arrUnused, intBytes = storage.compressFrames(arrFrames)
+    intBytes += sum(getDataSize(objData) for objData in arrUnused)
+    for objData in arrUnused:
+        fingerprint.setFingerprintDirty(objData)
+    if len(arrUnused) > 0:
+        bpy.data.batch_remove(arrUnused)
+    setDedupIndexDirty()
+    setSwapPlanDirty(obj)
+    return {'frames': len(arrUnused), 'bytes': intBytes}
+
+
+def expandFrames(obj):
+    intSwapId = obj.get("key_id")
+    intCount = 0
+    if intSwapId is not None:
+        for objFrame in getGroupFrames(intSwapId):
+            if storage.isDeltaFrame(objFrame):
+                storage.expandFrame(objFrame)
+                intCount += 1
+        setSwapPlanDirty(obj)
+    return intCount
+
+
+#### || FRAME STREAMING ||####
+def getWindowFrames(obj, intStart, intEnd):
+    # frame objects held by obj's keys anywhere in [intStart, intEnd], in time order
+    objFCurve = keyframes.getFCurveByPath(obj, '["key_object_id"]', False)
+    if objFCurve is None:
+        return []
+    objTimeline = keyframes.getTimeline(objFCurve)
+    arrFrames = objTimeline['frames']
+    intFirst = max(bisect.bisect_right(arrFrames, intStart) - 1, 0)
+    intLast = bisect.bisect_right(arrFrames, intEnd)
+    arrWindow = []
+    for fltValue in objTimeline['values'][intFirst:intLast]:
+        objFrame = getFrameObject(obj, int(fltValue))
+        if objFrame is not None and objFrame not in arrWindow:
+            arrWindow.append(objFrame)
+    return arrWindow
+
+
+def setStreamWindow(scene):
+    # frames near the playhead stay in memory, the rest are offloaded least recently used first, see stream.py
+    intFrame = scene.frame_current
+    intWindow = scene.KEY_stream_window
+    intDirection = stream.setDirection(intFrame)
+    arrKeep = []
+    arrPrefetch = []
+    setSwapIds = set()
+    for obj in getSwapObjects(scene):
+        setSwapIds.add(obj.get("key_id"))
+        arrKeep += getWindowFrames(obj, intFrame -
+                                   intWindow, intFrame + intWindow)
+        if intDirection > 0:
+            arrPrefetch += getWindowFrames(obj, intFrame, intFrame + intWindow)
+        else:
+            arrPrefetch += reversed(getWindowFrames(obj,
+                                    intFrame - intWindow, intFrame))
+    buildRegistry()
+    arrFrames = [objFrame for arrKey, objFrame in list(dicFrameObjects.items())
+                 if arrKey[0] in setSwapIds and isValidObject(objFrame) and objFrame.library is None]
+    stream.updateResidency(arrFrames, arrKeep, arrPrefetch,
+                           scene.KEY_stream_cache)
+
+
+def setStreaming(self, context):
+    # property update, turning streaming off brings every frame back
+    if self.KEY_stream == False:
+        stream.restoreAll()
+    else:
+        setStreamWindow(self)
+
+
+#### || ORPHAN FRAMES ||####
+def getStripActions(arrStrips):
+    # nla strips and the strips inside meta strips
+    for objStrip in arrStrips:
+        if objStrip.action is not None:
+            yield objStrip.action
+        yield from getStripActions(objStrip.strips)
+
+
+def getOwnerActions(obj):
+    # the active action plus every action in the nla, stashed actions are nla tracks too
+    objAnimationData = obj.animation_data
+    if objAnimationData is None:
+        return []
+    arrActions = []
+    if objAnimationData.action is not None:
+        arrActions.append(objAnimationData.action)
+    for objTrack in objAnimationData.nla_tracks:
+        arrActions.extend(getStripActions(objTrack.strips))
+    return arrActions
+
+
+def getKeyValues(objAction):
+    # key_object_id values keyed in an action, None when it has no swap keys
+    arrFCurves = keyframes.getFCurveIndex(
+        objAction)['paths'].get('["key_object_id"]')
+    if arrFCurves is None:
+        return None
+    setValues = set()
+    for fcurve in arrFCurves:
+        setValues.update(int(fltValue)
+                         for fltValue in keyframes.getTimeline(fcurve)['values'])
+    return setValues
+
+
+def getReferencedFrames():
+    # (key_id, key_object_id) used by any key_object_id keyframe, or currently displayed, plus every key_id with an owner
+    # the values of swap key actions no owner uses (fake user, deleted owner) count for every key_id
+    setFrames = set()
+    setSwapIds = set()
+    setOwned = set()
+    for obj in bpy.data.objects:
+        intSwapId = obj.get("key_id")
+        if intSwapId is None or isFrameObject(obj):
+            continue
+        setSwapIds.add(intSwapId)
+        for objAction in getOwnerActions(obj):
+            setOwned.add(objAction.as_pointer())
+            setValues = getKeyValues(objAction)
+            if setValues is not None:
+                setFrames.update((intSwapId, intValue)
+                                 for intValue in setValues)
+        objFrame = getDisplayedFrame(obj)
+        if objFrame is not None:
+            setFrames.add(getRegistryKey(objFrame))
+    setUnowned = set()
+    for objAction in bpy.data.actions:
+        if objAction.as_pointer() not in setOwned:
+            setUnowned.update(getKeyValues(objAction) or ())
+    return setFrames, setSwapIds, setUnowned
+
+
+def getOrphanFrames():
+    buildRegistry()
+    setFrames, setSwapIds, setUnowned = getReferencedFrames()
+    arrFrames = []
+    arrTmps = []
+    for arrKey, objFrame in list(dicFrameObjects.items()):
+        if arrKey in setFrames or arrKey[1] in setUnowned:
+            continue
+        if isValidObject(objFrame) and objFrame.library is None and objFrame.asset_data is None:
+            arrFrames.append(objFrame)
+    for intSwapId, objTmp in list(dicTmpObjects.items()):
+        if isValidObject(objTmp) and objTmp.library is None and intSwapId not in setSwapIds:
+            arrTmps.append(objTmp)
+    return arrFrames, arrTmps
+
+
+def removeOrphanFrames(dryRun=False):
+    # frame and tmp objects nobody references anymore, removed with their datablocks in one batch
+    arrFrames, arrTmps = getOrphanFrames()
+    arrObjects = arrFrames + arrTmps
+    dicDataUsers = {}
+    for obj in arrObjects:
+        if obj.data is not None:
+            dicDataUsers[obj.data] = dicDataUsers.get(obj.data, 0) + 1
+    arrData = [objData for objData, intUsers in dicDataUsers.items()
+               if objData.users - int(objData.use_fake_user) <= intUsers]
+    objReport = {
+        'frames': len(arrFrames),
+        'tmps': len(arrTmps),
+        'data': len(arrData),
+        'bytes': sum(getDataSize(objData) for objData in arrData),
+    }
+    if dryRun == False and len(arrObjects) > 0:
+        for obj in arrObjects:
+            unregisterObject(obj, True)
+        for objData in arrData:
+            fingerprint.setFingerprintDirty(objData)
+        bpy.data.batch_remove(arrObjects + arrData)
+        setDedupIndexDirty()
+        setSwapPlanDirty()
+    return objReport
+
+
 def removeObject(obj):
+    unregisterObject(obj, True)
     bpy.data.objects.remove(obj)
     strType = obj.type
     if strType == 'CURVE':
@@ -317,13 +1254,15 @@ def getBlankFrameObject(obj):
         objTmp.data.use_fake_user = True
         objTmp.use_fake_user = True
         objTmp["key_object_id"] = intSwapObjectID
-        objTmp["key_id"] = intSwapId
+        setObjectKey(objTmp, intSwapId, intSwapObjectID)
         removeGeo(objTmp)
         return objTmp
 
 
 def redraw(arrAreas=[]):
     # redraw(['DOPESHEET_EDITOR', 'GRAPH_EDITOR'])
+    if isRenderMode() or bpy.context.screen is None:
+        return
     for area in bpy.context.screen.areas:
         if len(arrAreas) == 0 or area.type in arrAreas:
             for region in area.regions:
@@ -335,8 +1274,7 @@ def remove_keys(obj, intFrame, all=False):
     # TODO: this should be passed into the function
     if all == False:
         strPath = '["key_object_id"]'
-    keyframes.removeKeyframe(obj, strPath, intFrame, False)
-    keyframes.removeKeyframe(obj, strPath, intFrame, True)
+    keyframes.removeKeyframes(obj, {intFrame}, strPath, None, truncate=True)
 
     # pull keyframes left by one
     keyframes.nudgeFrames(obj, intFrame, -1, False, None, strPath)
@@ -389,8 +1327,7 @@ def clone_unique_key(context, obj, intFrame):
     # get the current frame object
     intSwapObjectId = keyframes.getKeyframeValue(
         obj, '["key_object_id"]', intFrame, '=')
-    strFrameObject = getSwapObjectName(obj.get("key_id"), intSwapObjectId)
-    objFrame = getObject(strFrameObject)
+    objFrame = getFrameObject(obj, intSwapObjectId)
     # copy the current frame object to a new one
     addSwapObjects(context, [objFrame], obj)
     return
@@ -411,17 +1348,18 @@ def clone_object(context, obj, blank=False):
     for intFrame in arrFrames:
         intFrame = int(intFrame)
         # get the frame IDs
-        strFrame = getSwapObjectName(getSwapId(obj), intFrame)
-        objFrame = getObject(strFrame)
+        objFrame = getFrameObject(obj, intFrame)
         if objFrame:
-            strNewFrame = getSwapObjectName(intSwapId, intFrame)
-            objNewFrame = getObject(strNewFrame)
+            objNewFrame = getFrameObject(objNew, intFrame)
             if objNewFrame is None:
                 objNewFrame = getObjectCopy(objFrame)
-                objNewFrame.name = strNewFrame
-            objNewFrame['key_id'] = intSwapId
+                objNewFrame.name = getSwapObjectName(intSwapId, intFrame)
+                setObjectKey(objNewFrame, intSwapId, intFrame)
             if blank == True:
                 removeGeo(objNewFrame)
+            objDataBlock = setSharedData(objNewFrame)
+            if objDataBlock is not None:
+                removeDataBlock(objDataBlock)
     return objNew
 
 
@@ -432,24 +1370,23 @@ def add_asset(obj):
     # set the collection as an asset .asset_mark()
     for intFrame in arrFrames:
         intFrame = int(intFrame)
-        strFrameObject = getSwapObjectName(obj.get("key_id"), intFrame)
-        objFrame = getObject(strFrameObject)
+        objFrame = getFrameObject(obj, intFrame)
         if objFrame:
+            storage.expandFrame(objFrame)
             objFrame.asset_mark()
             objFrame.asset_generate_preview()
 
 
 def getCurrentFrame(obj, intFrame, link=True):
     # get the data object needed.
-    strFrame = obj.get("key_object")
-    objFrame = getObject(strFrame)
+    objFrame = getDisplayedFrame(obj)
 
     if objFrame == None:
         objFrame = obj
     strFrameName = f'{obj.name}_Frame_{intFrame}'
     # make a copy
     objNew = bpy.data.objects.new(
-        strFrameName, objFrame.data.copy())
+        strFrameName, storage.getFrameData(objFrame).copy())
     if link == True:
         objCollection = obj.users_collection[0]
         objCollection.objects.link(objNew)
@@ -474,16 +1411,22 @@ def exposeSelectedFrameObjects(obj, intFrame, remove=False, select=True):
         # get the object for that keyframe
         intSwapObjectId = keyframes.getKeyframeValue(
             obj, '["key_object_id"]', intFrame, '=')
-        strFrameObject = getSwapObjectName(obj.get("key_id"), intSwapObjectId)
-        objFrame = getObject(strFrameObject)
+        objFrame = getFrameObject(obj, intSwapObjectId)
         # link the object to the same collection as parent
         if objFrame == None:
             objFrame = obj.copy()
         strFrameName = f'{obj.name}_Frame_{intFrame}'
         if remove == True:
+            clearObjectKey(objFrame)
+            storage.expandFrame(objFrame)
+            # deduplicated frames share their datablock, the exposed object gets its own and leaves the frame pool
+            setUniqueData(objFrame)
+            if objFrame.data is not None:
+                objFrame.data.use_fake_user = False
             objFrame.name = strFrameName
             objCollection.objects.link(objFrame)
             objFrame['key_id'] = None
+            setSwapObjectsDirty()
             # remove keyframes from old object
             keyframes.actKeyframe(obj, intFrame, 'remove')
             objFrame.animation_data_clear()
@@ -493,7 +1436,7 @@ def exposeSelectedFrameObjects(obj, intFrame, remove=False, select=True):
         elif remove == False:
             # make a copy
             objNew = bpy.data.objects.new(
-                strFrameName, objFrame.data.copy())
+                strFrameName, storage.getFrameData(objFrame).copy())
             objCollection.objects.link(objNew)
             objNew.select_set(select)
             objNew.data.animation_data_clear()
@@ -502,7 +1445,7 @@ def exposeSelectedFrameObjects(obj, intFrame, remove=False, select=True):
             copySelections(obj, objNew)
             arrNewObjects.append(objNew)
         else:
-            print('stop motion could find frame object to separate', strFrameObject)
+            print('stop motion could find frame object to separate', intSwapObjectId)
     obj.select_set(not select)
     return arrNewObjects
 
@@ -668,13 +1611,49 @@ def copySelections(objSource, objTarget):
                     pass
 
 
-def swapMaterials(objSource, objTarget):
+#### || MATERIAL SIGNATURES ||####
+# per frame object, the materials swapMaterials assigns, valid while its datablock and slot count are unchanged
+dicMaterialSignatures = {}
+
+
+def getMaterialSignature(objSource):
+    intPointer = objSource.as_pointer()
+    intData = objSource.data.as_pointer()
     arrSourceMaterials = objSource.material_slots
-    if len(arrSourceMaterials) > 0:
-        objTarget.data.materials.clear()
-        for i, objMaterial in enumerate(reversed(arrSourceMaterials)):
-            objTarget.data.materials.append(
-                bpy.data.materials[objMaterial.name])
+    objSignature = dicMaterialSignatures.get(intPointer)
+    if objSignature is None or objSignature['data'] != intData or objSignature['count'] != len(arrSourceMaterials):
+        objSignature = {
+            'data': intData,
+            'count': len(arrSourceMaterials),
+            'materials': tuple(objMaterial.material for objMaterial in reversed(arrSourceMaterials)),
+        }
+        dicMaterialSignatures[intPointer] = objSignature
+    return objSignature['materials']
+
+
+def setMaterialSignatureDirty(obj=None):
+    if obj is None:
+        dicMaterialSignatures.clear()
+    else:
+        dicMaterialSignatures.pop(obj.as_pointer(), None)
+
+
+def swapMaterials(objSource, objTarget):
+    if objSource.data == objTarget.data:
+        return
+    arrMaterials = getMaterialSignature(objSource)
+    if len(arrMaterials) > 0:
+        arrTargetMaterials = objTarget.data.materials
+        if tuple(arrTargetMaterials) == arrMaterials:
+            return
+        # resize once and only reassign the slots that differ, every write triggers a relations update
+        while len(arrTargetMaterials) > len(arrMaterials):
+            arrTargetMaterials.pop()
+        for i, objMaterial in enumerate(arrMaterials):
+            if i >= len(arrTargetMaterials):
+                arrTargetMaterials.append(objMaterial)
+            elif arrTargetMaterials[i] != objMaterial:
+                arrTargetMaterials[i] = objMaterial
 
 
 def selectNone():
@@ -686,6 +1665,8 @@ def applyModifiers(obj, context=None):
     if context == None:
         context = bpy.context
     context.view_layer.objects.active = obj
+    if obj.get("key_id") is not None:
+        setEditTmp(obj)
     for mod in obj.modifiers:
         if mod.show_viewport:
             bpy.ops.object.modifier_apply(modifier=mod.name, single_user=True)
@@ -0,0 +1,237 @@
+import bpy
+import hashlib
+import numpy as np
+
+# geometry fingerprints for equal or not compares of frame datablocks
+# coordinates and topology are read with foreach_get into numpy buffers and digested in one go
+
+# digests by datablock pointer, also stored on the datablock so reopened files don't rehash every frame
+dicFingerprints = {}
+FINGERPRINT_PROP = 'key_fingerprint'
+# bumped whenever the hashed content changes, digests stored by older versions are recomputed
+FINGERPRINT_VERSION = 3
+# topology digests by datablock pointer, memory only
+dicTopologies = {}
+
+
+def getArray(objCollection, strAttribute, intSize=1, dtype=np.float32):
+    arrData = np.empty(len(objCollection) * intSize, dtype=dtype)
+    if len(arrData) > 0:
+        objCollection.foreach_get(strAttribute, arrData)
+    return arrData
+
+
+# attribute data type: (foreach attribute, values per element, buffer type)
+ATTRIBUTE_TYPES = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT2': ('vector', 2, np.float32),
+    'INT32_2D': ('value', 2, np.int32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+    'FLOAT4X4': ('value', 16, np.float32),
+}
+# mesh data kept outside the attribute api in older blender versions, hashed where the property exists
+# (collection, property, values per element, buffer type, the builtin attribute holding it in newer versions)
+MESH_PROPERTIES = (
+    ('polygons', 'material_index', 1, np.int32, 'material_index'),
+    ('polygons', 'use_smooth', 1, bool, 'sharp_face'),
+    ('edges', 'use_seam', 1, bool, '.uv_seam'),
+    ('edges', 'use_edge_sharp', 1, bool, 'sharp_edge'),
+    ('edges', 'crease', 1, np.float32, 'crease_edge'),
+    ('edges', 'bevel_weight', 1, np.float32, 'bevel_weight_edge'),
+    ('vertices', 'bevel_weight', 1, np.float32, 'bevel_weight_vert'),
+)
+# builtin attributes behind vertex positions and the topology arrays, hashed through the mesh api
+TOPOLOGY_ATTRIBUTES = ('position', '.edge_verts', '.corner_vert', '.poly_offset')
+
+
+def setAttributeHash(objData, objHash, setSkip):
+    # every generic attribute, uv maps and colors included, selection is ui state and left out
+    for objAttribute in sorted(objData.attributes, key=lambda objAttribute: objAttribute.name):
+        if objAttribute.name.startswith('.select') or objAttribute.name in setSkip:
+            continue
+        objHash.update(
+            f'{objAttribute.name}.{objAttribute.domain}.{objAttribute.data_type}'.encode())
+        arrType = ATTRIBUTE_TYPES.get(objAttribute.data_type)
+        if arrType is None:
+            # unknown types can't be compared, never equal to anything else
+            objHash.update(str(objData.as_pointer()).encode())
+            continue
+        strValue, intSize, dtype = arrType
+        objHash.update(getArray(objAttribute.data, strValue,
+                       intSize, dtype).tobytes())
+
+
+def setMeshHash(objData, objHash):
+    objHash.update(getArray(objData.vertices, 'co', 3).tobytes())
+    setMeshDataHash(objData, objHash)
+
+
+def setMeshDataHash(objData, objHash):
+    # topology and every attribute of a mesh except vertex positions
+    objHash.update(getArray(objData.edges, 'vertices', 2, np.int32).tobytes())
+    objHash.update(getArray(objData.polygons, 'loop_total',
+                   1, np.int32).tobytes())
+    objHash.update(getArray(objData.loops, 'vertex_index',
+                   1, np.int32).tobytes())
+    # attributes also read through a property below are only hashed once
+    setSkip = set(TOPOLOGY_ATTRIBUTES)
+    arrProperties = []
+    for strCollection, strAttribute, intSize, dtype, strBuiltin in MESH_PROPERTIES:
+        objCollection = getattr(objData, strCollection)
+        if len(objCollection) > 0 and hasattr(objCollection[0], strAttribute):
+            setSkip.add(strBuiltin)
+            arrProperties.append(
+                (objCollection, strAttribute, intSize, dtype))
+    setAttributeHash(objData, objHash, setSkip)
+    for objCollection, strAttribute, intSize, dtype in arrProperties:
+        objHash.update(strAttribute.encode())
+        objHash.update(getArray(objCollection, strAttribute,
+                       intSize, dtype).tobytes())
+    if bpy.app.version < (3, 5, 0):
+        # uv maps became attributes in 3.5
+        for uv_layer in objData.uv_layers:
+            objHash.update(uv_layer.name.encode())
+            objHash.update(getArray(uv_layer.data, 'uv', 2).tobytes())
+    if bpy.app.version < (3, 2, 0):
+        # and vertex colors in 3.2
+        for vertex_color in objData.vertex_colors:
+            objHash.update(vertex_color.name.encode())
+            objHash.update(getArray(vertex_color.data, 'color', 4).tobytes())
+    for strProperty in ('use_auto_smooth', 'auto_smooth_angle'):
+        if hasattr(objData, strProperty):
+            objHash.update(str(getattr(objData, strProperty)).encode())
+
+
+def getTopologyFingerprint(objData):
+    # everything of a mesh except vertex positions, frames with equal topology only differ in coordinates
+    objHash = hashlib.blake2b(digest_size=16)
+    objHash.update(np.array([len(objData.vertices)], dtype=np.int64).tobytes())
+    setMeshDataHash(objData, objHash)
+    for objMaterial in objData.materials:
+        if objMaterial is not None:
+            objHash.update(objMaterial.name_full.encode())
+    return objHash.hexdigest()
+
+
+def setCurveHash(objData, objHash):
+    # curves and surfaces, splines are usually few, their points are read in bulk
+    for spline in objData.splines:
+        objHash.update(spline.type.encode())
+        objHash.update(np.array([spline.use_cyclic_u, spline.use_cyclic_v, spline.order_u,
+                       spline.order_v, spline.resolution_u, spline.resolution_v], dtype=np.int32).tobytes())
+        if len(spline.bezier_points) > 0:
+            objHash.update(getArray(spline.bezier_points, 'co', 3).tobytes())
+            objHash.update(getArray(spline.bezier_points,
+                           'handle_left', 3).tobytes())
+            objHash.update(getArray(spline.bezier_points,
+                           'handle_right', 3).tobytes())
+            objHash.update(getArray(spline.bezier_points, 'radius').tobytes())
+            objHash.update(getArray(spline.bezier_points, 'tilt').tobytes())
+        if len(spline.points) > 0:
+            objHash.update(getArray(spline.points, 'co', 4).tobytes())
+            objHash.update(getArray(spline.points, 'radius').tobytes())
+            objHash.update(getArray(spline.points, 'tilt').tobytes())
+
+
+def setTextHash(objData, objHash):
+    objHash.update(objData.body.encode())
+    if objData.font is not None:
+        objHash.update(objData.font.name_full.encode())
+    objHash.update(np.array([objData.size, objData.shear, objData.space_character, objData.space_word,
+                   objData.space_line, objData.offset, objData.extrude, objData.bevel_depth], dtype=np.float32).tobytes())
+
+
+def setMetaHash(objData, objHash):
+    objHash.update(getArray(objData.elements, 'co', 3).tobytes())
+    objHash.update(getArray(objData.elements, 'rotation', 4).tobytes())
+    objHash.update(getArray(objData.elements, 'radius').tobytes())
+    objHash.update(getArray(objData.elements, 'stiffness').tobytes())
+    for strSize in ('size_x', 'size_y', 'size_z'):
+        objHash.update(getArray(objData.elements, strSize).tobytes())
+    for element in objData.elements:
+        objHash.update(element.type.encode())
+        objHash.update(bytes([element.use_negative]))
+
+
+def getFingerprint(objData):
+    # hex digest of the geometry, None for datablocks without geometry to compare
+    objHash = hashlib.blake2b(digest_size=16)
+    if isinstance(objData, bpy.types.Mesh):
+        objHash.update(b'MESH')
+        setMeshHash(objData, objHash)
+    elif isinstance(objData, bpy.types.TextCurve):
+        objHash.update(b'FONT')
+        setTextHash(objData, objHash)
+    elif isinstance(objData, bpy.types.Curve):
+        # SurfaceCurve is a Curve too
+        objHash.update(b'CURVE')
+        setCurveHash(objData, objHash)
+    elif isinstance(objData, bpy.types.MetaBall):
+        objHash.update(b'META')
+        setMetaHash(objData, objHash)
+    else:
+        return None
+    return objHash.hexdigest()
+
+
+def getSizeKey(objData):
+    # cheap sanity check for persisted digests, catches files edited without the addon
+    if isinstance(objData, bpy.types.Mesh):
+        return f'{len(objData.vertices)}.{len(objData.edges)}.{len(objData.loops)}'
+    elif isinstance(objData, bpy.types.TextCurve):
+        return str(len(objData.body))
+    elif isinstance(objData, bpy.types.Curve):
+        return str(len(objData.splines))
+    elif isinstance(objData, bpy.types.MetaBall):
+        return str(len(objData.elements))
+    return ''
+
+
+def getCachedFingerprint(objData):
+    intPointer = objData.as_pointer()
+    strSizeKey = getSizeKey(objData)
+    arrCached = dicFingerprints.get(intPointer)
+    # pointers of freed datablocks get reused, the size key must still match
+    if arrCached is not None and arrCached[0] == strSizeKey:
+        return arrCached[1]
+    strStored = objData.get(FINGERPRINT_PROP)
+    strPrefix = f'{FINGERPRINT_VERSION}.{strSizeKey}:'
+    if isinstance(strStored, str) and strStored.startswith(strPrefix):
+        strFingerprint = strStored[len(strPrefix):]
+    else:
+        strFingerprint = getFingerprint(objData)
+        if strFingerprint is None:
+            return None
+        if objData.library is None:
+            objData[FINGERPRINT_PROP] = f'{strPrefix}{strFingerprint}'
+    dicFingerprints[intPointer] = (strSizeKey, strFingerprint)
+    return strFingerprint
+
+
+def getCachedTopology(objData):
+    intPointer = objData.as_pointer()
+    strSizeKey = getSizeKey(objData)
+    arrCached = dicTopologies.get(intPointer)
+    if arrCached is None or arrCached[0] != strSizeKey:
+        arrCached = (strSizeKey, getTopologyFingerprint(objData))
+        dicTopologies[intPointer] = arrCached
+    return arrCached[1]
+
+
+def setFingerprintDirty(objData=None, topology=True):
+    # topology=False for writes that only move vertices, the topology digest stays valid
+    if objData is None:
+        dicFingerprints.clear()
+        dicTopologies.clear()
+        return
+    dicFingerprints.pop(objData.as_pointer(), None)
+    if topology == True:
+        dicTopologies.pop(objData.as_pointer(), None)
+    if objData.library is None and FINGERPRINT_PROP in objData:
+        del objData[FINGERPRINT_PROP]
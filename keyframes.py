@@ -1,3 +1,144 @@
+import bisect
+import re
+import contextlib
+import numpy as np
+
+#### || KEYFRAME ARRAYS ||####
+# keyframe points read with foreach_get into numpy, one call per attribute instead of one per point
+
+
+def getKeyframeArrays(fcurve, select=False):
+    # frames and values in point order, plus the selection flags when asked for
+    keyframe_points = fcurve.keyframe_points
+    arrCo = np.empty(len(keyframe_points) * 2, dtype=np.float32)
+    arrSelect = None
+    if len(arrCo) > 0:
+        keyframe_points.foreach_get('co', arrCo)
+    if select == True:
+        arrSelect = np.empty(len(keyframe_points), dtype=bool)
+        if len(arrSelect) > 0:
+            keyframe_points.foreach_get('select_control_point', arrSelect)
+    return arrCo[0::2], arrCo[1::2], arrSelect
+
+
+def getPointIndex(arrX, intFrame):
+    # first point on intFrame, None when there is none
+    arrIndex = np.flatnonzero(arrX == intFrame)
+    if len(arrIndex) == 0:
+        return None
+    return int(arrIndex[0])
+
+# fcurves per action by data_path, rebuilt when the fcurve count changes or the action was freed or renamed
+dicFCurveIndex = {}
+
+# sorted (frame, value) arrays per fcurve for binary searches, rebuilt when the keyframe count changes or the curve is marked dirty
+dicTimelines = {}
+
+
+def getTimeline(fcurve):
+    intPointer = fcurve.as_pointer()
+    intCount = len(fcurve.keyframe_points)
+    objTimeline = dicTimelines.get(intPointer)
+    if objTimeline is None or objTimeline['count'] != intCount:
+        arrX, arrY, arrSelect = getKeyframeArrays(fcurve)
+        arrOrder = np.lexsort((arrY, arrX))
+        objTimeline = {
+            'count': intCount,
+            'action': fcurve.id_data.as_pointer(),
+            'frames': arrX[arrOrder].tolist(),
+            'values': arrY[arrOrder].tolist(),
+        }
+        dicTimelines[intPointer] = objTimeline
+    return objTimeline
+
+
+def getTimelineHold(objTimeline, intFrame):
+    # value at intFrame plus the [start, end) range of frames that hold the same key
+    arrFrames = objTimeline['frames']
+    if objTimeline['count'] == 0:
+        return None, None, None
+    intIndex = bisect.bisect_right(arrFrames, intFrame) - 1
+    fltStart = float('-inf')
+    if intIndex > 0:
+        fltStart = arrFrames[intIndex]
+    else:
+        # the first key is used for frames before it
+        intIndex = 0
+    fltEnd = float('inf')
+    if intIndex + 1 < len(arrFrames):
+        fltEnd = arrFrames[intIndex + 1]
+    return int(objTimeline['values'][intIndex]), fltStart, fltEnd
+
+
+def setTimelineDirty(fcurve=None, intAction=None):
+    if fcurve is not None:
+        dicTimelines.pop(fcurve.as_pointer(), None)
+    elif intAction is not None:
+        for intPointer in [intPointer for intPointer, objTimeline in dicTimelines.items() if objTimeline['action'] == intAction]:
+            del dicTimelines[intPointer]
+    else:
+        dicTimelines.clear()
+
+
+#### || DEFERRED UPDATES ||####
+# inside deferUpdates() keyframe edits skip the sort and handle recalculation of their fcurve
+# each touched fcurve is updated once when the outermost batch ends, instead of once per edit
+# commitUpdates() inside a batch applies what is pending, before anything that evaluates the curves like frame_set
+
+objBatch = {'depth': 0, 'fcurves': {}}
+
+
+@contextlib.contextmanager
+def deferUpdates():
+    objBatch['depth'] += 1
+    try:
+        yield
+    finally:
+        objBatch['depth'] -= 1
+        if objBatch['depth'] == 0:
+            commitUpdates()
+
+
+def commitUpdates():
+    arrFCurves = list(objBatch['fcurves'].values())
+    objBatch['fcurves'].clear()
+    for fcurve in arrFCurves:
+        try:
+            fcurve.update()
+        except ReferenceError:
+            # removed with its action during the batch
+            pass
+
+
+def setFCurveUpdate(fcurve):
+    if objBatch['depth'] > 0:
+        objBatch['fcurves'][fcurve.as_pointer()] = fcurve
+    else:
+        fcurve.update()
+
+
+def insertKeyframePoint(fcurve, intFrame, fltValue, strInterpolation=None, strType=None):
+    # FAST keeps the points sorted but leaves the handles to setFCurveUpdate, only the new point is styled
+    setTimelineDirty(fcurve)
+    objKeyframe = fcurve.keyframe_points.insert(
+        frame=intFrame, value=fltValue, options={'FAST'})
+    setKeyframeStyle(objKeyframe, strInterpolation, strType)
+    setFCurveUpdate(fcurve)
+    return objKeyframe
+
+
+def setKeyframeStyle(objKeyframe, strInterpolation=None, strType=None):
+    if objKeyframe is None:
+        return
+    if strInterpolation is not None:
+        objKeyframe.interpolation = strInterpolation
+    if strType is not None:
+        try:
+            objKeyframe.type = strType
+        except:
+            pass
+
+
 def getFCurves(obj, inDataBlock=False):
     arrFCurves = []
     if inDataBlock == False and hasattr(obj, 'animation_data') == True and hasattr(obj.animation_data, 'action') == True:
@@ -13,30 +154,79 @@ def getFCurves(obj, inDataBlock=False):
     return arrFCurves
 
 
+def getAction(obj, inDataBlock=False):
+    objOwner = obj.data if inDataBlock == True else obj
+    objAnimationData = getattr(objOwner, 'animation_data', None)
+    if objAnimationData is None:
+        return None
+    return objAnimationData.action
+
+
+def getFCurveIndex(objAction):
+    intPointer = objAction.as_pointer()
+    intCount = len(objAction.fcurves)
+    objIndex = dicFCurveIndex.get(intPointer)
+    # a freed action's address can be reused by a new one, with the same name too, session_uid is never reused
+    if objIndex is not None and (objIndex['uid'] != objAction.session_uid or objIndex['count'] != intCount or objIndex['name'] != objAction.name_full):
+        objIndex = None
+    if objIndex is None:
+        objIndex = {
+            'uid': objAction.session_uid,
+            'count': intCount,
+            'name': objAction.name_full,
+            'paths': {},
+        }
+        for fcurve in objAction.fcurves:
+            objIndex['paths'].setdefault(fcurve.data_path, []).append(fcurve)
+        dicFCurveIndex[intPointer] = objIndex
+    return objIndex
+
+
+def setFCurveIndexDirty(intAction=None):
+    if intAction is None:
+        dicFCurveIndex.clear()
+    else:
+        dicFCurveIndex.pop(intAction, None)
+
+
 def getFCurveByPath(obj, strPath, inDataBlock, inverse=False):
-    arrFCurves = getFCurves(obj, inDataBlock)
+    # first fcurve on strPath, or all of them with inverse
+    objAction = getAction(obj, inDataBlock)
     arrReturn = []
-    for fcurve in arrFCurves:
-        if fcurve.data_path == strPath:
-            if inverse:
-                arrReturn.append(fcurve)
-            else:
-                return fcurve
+    if objAction is not None:
+        arrReturn = getFCurveIndex(objAction)['paths'].get(strPath, [])
     if inverse:
-        return arrReturn
+        return list(arrReturn)
+    if len(arrReturn) > 0:
+        return arrReturn[0]
     return None
 
 
+def getPathFCurves(obj, strPath, inDataBlock=False):
+    # every fcurve when strPath is None
+    if strPath is None:
+        return list(getFCurves(obj, inDataBlock))
+    return getFCurveByPath(obj, strPath, inDataBlock, True)
+
+
 def removeFCurves(obj, inDataBlock=False, strNot=None):
     arrFCurves = getFCurves(obj, inDataBlock)
+    setFCurveIndexDirty()
     for fCurve in arrFCurves:
         if strNot == None or fCurve.data_path != strNot:
+            setTimelineDirty(fCurve)
             arrFCurves.remove(fCurve)
 
 
-def copyDataKeyframes(objSource, objTarget, strNot):
+def copyDataKeyframes(objSource, objTarget, strNot, link=True):
     if objSource and objTarget:
-        if objSource.data.animation_data is not None and hasattr(objSource.data.animation_data, 'copy'):
+        if objSource.data == objTarget.data:
+            # the target displays the frame datablock, its animation comes with it
+            return
+        if link == True:
+            # reference the frame's action directly, nothing is copied per swap
+            linkDataAction(objSource.data, objTarget.data)
+        elif objSource.data.animation_data is not None and hasattr(objSource.data.animation_data, 'copy'):
             objTarget.data.animation_data = objSource.data.animation_data.copy()
     # This function is specifically for data blocks, data blocks get weird on some objects where they are pointers and read only
         # remove specific destination fcurves that will be in the way
@@ -53,15 +243,31 @@ def copyDataKeyframes(objSource, objTarget, strNot):
     return
 
 
+def linkDataAction(objSourceData, objTargetData):
+    objAction = None
+    if objSourceData.animation_data is not None:
+        objAction = objSourceData.animation_data.action
+    objAnimationData = objTargetData.animation_data
+    if objAction is None:
+        if objAnimationData is not None and objAnimationData.action is not None:
+            objAnimationData.action = None
+        return
+    if objAnimationData is None:
+        objAnimationData = objTargetData.animation_data_create()
+    if objAnimationData.action != objAction:
+        objAnimationData.action = objAction
+
+
 def actKeyframe(obj, intFrame, strMode, inDataBlock=False):
+    if strMode == 'remove':
+        removeKeyframes(obj, {intFrame}, None, inDataBlock)
+        return
     arrFcurves = getFCurves(obj, inDataBlock)
     for fcurve in arrFcurves:
-        for keyframe in fcurve.keyframe_points:
-            if keyframe.co[0] == intFrame:
-                if strMode == 'get':
-                    return keyframe
-                elif strMode == 'remove':
-                    fcurve.keyframe_points.remove(keyframe)
+        arrX, arrY, arrSelect = getKeyframeArrays(fcurve)
+        intIndex = getPointIndex(arrX, intFrame)
+        if intIndex is not None and strMode == 'get':
+            return fcurve.keyframe_points[intIndex]
 
 
 def setFrameSpacing(obj, intSpacing, inDataBlock=False):
@@ -71,13 +277,12 @@ def setFrameSpacing(obj, intSpacing, inDataBlock=False):
         obj, None, 'x', inDataBlock, frames='selected')
     arrUnSelectedFrames = getSelectedFrames(
         obj, None, 'x', inDataBlock, frames='unSelected')
-    intFrameCount = len(arrSelectedFrames)
-    if intFrameCount > 0:
+    if len(arrSelectedFrames) > 0:
         # ordered unique set of selected Frames to work with across obj and data block
-        arrSelectedFrames = list(set(arrSelectedFrames))
-        arrSelectedFrames.sort()
+        arrSelectedFrames = np.unique(arrSelectedFrames).tolist()
+        intFrameCount = len(arrSelectedFrames)
         intFirstFrame = arrSelectedFrames[0]
-        intRange = arrSelectedFrames[intFrameCount-1]-intFirstFrame
+        intRange = arrSelectedFrames[-1]-intFirstFrame
         # anything after this frame needs to get pushed by the delta.
         intLastFrame = intFirstFrame+(intFrameCount*intSpacing)
         # need to know if new range is larger or smaller
@@ -87,59 +292,82 @@ def setFrameSpacing(obj, intSpacing, inDataBlock=False):
                 dicFrames[intFrame] = intFirstFrame+(i*intSpacing)
         if len(arrUnSelectedFrames) > 0 and arrUnSelectedFrames[-1] > arrSelectedFrames[-1]:
             # make room by moving the unselected frame outside the range used + space
-            arrFramesToMove = []
-            for intFrame in arrUnSelectedFrames:
-                if intFrame > arrSelectedFrames[-1]:
-                    arrFramesToMove.append(intFrame)
+            arrFramesToMove = np.array(arrUnSelectedFrames)
+            arrFramesToMove = np.unique(
+                arrFramesToMove[arrFramesToMove > arrSelectedFrames[-1]]).tolist()
             for i, intFrame in enumerate(arrFramesToMove):
                 intDistance = intFrame - arrSelectedFrames[-1]
-                # the new last position + the spacing being set + how many spaces ahead it was
-                dicFrames[intFrame] = dicFrames[arrSelectedFrames[-1]
-                                                ] + intDistance
+                # the new last position + the spacing being set + how many spaces ahead it was, a single frame stays put
+                dicFrames[intFrame] = dicFrames.get(
+                    arrSelectedFrames[-1], arrSelectedFrames[-1]) + intDistance
         setNewFrames(obj, dicFrames, intLastFrame,
                      intRange, inDataBlock)
     return
 
 
 def setNewFrames(obj, dicFrames, intLastFrame, intPushFrames, inDataBlock=False):
+    # dicFrames as sorted arrays, every point's old frame is looked up with one searchsorted per curve
+    arrOldFrames = np.array(sorted(dicFrames.keys()), dtype=np.float64)
+    arrNewFrames = np.array([dicFrames[fltFrame]
+                            for fltFrame in arrOldFrames.tolist()], dtype=np.float64)
     arrFCurves = getFCurves(obj, inDataBlock)
     for i, fcurve in enumerate(arrFCurves):
-        for ii, keyframe_point in enumerate(fcurve.keyframe_points):
-            intFrame = keyframe_point.co.x
-            intNewFrame = dicFrames.get(intFrame)
-            if intNewFrame != None:
-                intDiff = intNewFrame - keyframe_point.co.x
-                keyframe_point.co.x = intNewFrame
-                keyframe_point.handle_left.x = keyframe_point.handle_left.x + intDiff
-                keyframe_point.handle_right.x = keyframe_point.handle_right.x + intDiff
-            elif intFrame > intLastFrame:
-                keyframe_point.co.x += intPushFrames
-                keyframe_point.handle_left.x = keyframe_point.handle_left.x + intPushFrames
-                keyframe_point.handle_right.x = keyframe_point.handle_right.x + intPushFrames
+        setTimelineDirty(fcurve)
+        arrX, arrY, arrSelect = getKeyframeArrays(fcurve)
+        arrX = arrX.astype(np.float64)
+        arrFound = np.zeros(len(arrX), dtype=bool)
+        arrNewX = arrX.copy()
+        if len(arrOldFrames) > 0:
+            arrIndex = np.minimum(np.searchsorted(
+                arrOldFrames, arrX), len(arrOldFrames) - 1)
+            arrFound = arrOldFrames[arrIndex] == arrX
+            arrNewX[arrFound] = arrNewFrames[arrIndex[arrFound]]
+        # frames after the respaced range are pushed back
+        arrPushed = ~arrFound & (arrX > intLastFrame)
+        arrNewX[arrPushed] += intPushFrames
+        arrMask = arrFound | arrPushed
+        if arrMask.any():
+            setKeyframeFrames(fcurve, arrMask, arrNewX, arrNewX - arrX)
     return
 
 
 def getKeyframeValue(obj, strPath, intFrame, mode, value='y'):
+    # points are taken in point order, like walking keyframe_points
     intFrameId = None
     objFCurve = getFCurveByPath(obj, strPath, False)
     if objFCurve != None:
-        for keyframe_point in objFCurve.keyframe_points:
-            intValue = getattr(keyframe_point.co, value)
-            if mode == '<':
-                if keyframe_point.co.x < intFrame or (intFrameId is None and keyframe_point.co.x != intFrame):
-                    intFrameId = intValue
-            elif mode == '=':
-                if keyframe_point.co.x == intFrame:
-                    intFrameId = intValue
-                    break
-            elif mode == '<=':
-                if keyframe_point.co.x <= intFrame or intFrameId is None:
-                    intFrameId = intValue
-            elif mode == 'max':
-                if intFrameId is None:
-                    intFrameId = 0
-                if keyframe_point.co.y > intFrameId or intFrameId is None:
-                    intFrameId = intValue
+        arrX, arrY, arrSelect = getKeyframeArrays(objFCurve)
+        arrValues = arrX if value == 'x' else arrY
+        intIndex = None
+        if len(arrX) == 0:
+            pass
+        elif mode == '<':
+            # the last point before intFrame, or else the first point not on it
+            arrIndex = np.flatnonzero(arrX < intFrame)
+            if len(arrIndex) == 0:
+                arrIndex = np.flatnonzero(arrX != intFrame)
+                arrIndex = arrIndex[:1]
+            if len(arrIndex) > 0:
+                intIndex = arrIndex[-1]
+        elif mode == '=':
+            intIndex = getPointIndex(arrX, intFrame)
+        elif mode == '<=':
+            # the last point up to intFrame, or else the first point
+            arrIndex = np.flatnonzero(arrX <= intFrame)
+            intIndex = arrIndex[-1] if len(arrIndex) > 0 else 0
+        elif mode == 'max':
+            # the first point with the highest value, 0 when no value is above 0
+            intFrameId = 0
+            if value == 'y':
+                if arrY.max() > 0:
+                    intIndex = np.argmax(arrY)
+            else:
+                # values are compared against the last frame taken
+                for fltY, fltValue in zip(arrY.tolist(), arrValues.tolist()):
+                    if fltY > intFrameId:
+                        intFrameId = fltValue
+        if intIndex is not None:
+            intFrameId = arrValues[intIndex]
     if intFrameId != None:
         intFrameId = int(intFrameId)
     return intFrameId
@@ -147,52 +375,73 @@ def getKeyframeValue(obj, strPath, intFrame, mode, value='y'):
 
 def getSelectedFrames(obj, strPath, mode='y', inDataBlock=False, frames='selected'):
     arrFrames = []
-    arrFCurves = getFCurves(obj, inDataBlock)
-    for i, fcurve in enumerate(arrFCurves):
-        if strPath is None or fcurve.data_path == strPath:
-            for ii, keyframe_point in enumerate(fcurve.keyframe_points):
-                if frames == 'selected' and keyframe_point.select_control_point == True:
-                    arrFrames.append(getattr(keyframe_point.co, mode))
-                elif frames == 'unSelected' and keyframe_point.select_control_point == False:
-                    arrFrames.append(getattr(keyframe_point.co, mode))
-                elif frames == 'all':
-                    arrFrames.append(getattr(keyframe_point.co, mode))
+    for fcurve in getPathFCurves(obj, strPath, inDataBlock):
+        arrX, arrY, arrSelect = getKeyframeArrays(
+            fcurve, frames != 'all')
+        arrValues = arrX if mode == 'x' else arrY
+        if frames == 'selected':
+            arrValues = arrValues[arrSelect]
+        elif frames == 'unSelected':
+            arrValues = arrValues[~arrSelect]
+        elif frames != 'all':
+            continue
+        arrFrames += arrValues.tolist()
     return arrFrames
 
 
 def setKeySelection(obj, intFrame=None, isSelected=True, strPath=None, inDataBlock=False):
-    arrFCurves = getFCurves(obj, inDataBlock)
-    for i, fcurve in enumerate(arrFCurves):
-        if strPath is None or fcurve.data_path == strPath:
-            for ii, keyframe_point in enumerate(fcurve.keyframe_points):
-                if keyframe_point.co.x == intFrame or intFrame is None:
-                    keyframe_point.select_control_point = isSelected
+    for fcurve in getPathFCurves(obj, strPath, inDataBlock):
+        arrX, arrY, arrSelect = getKeyframeArrays(fcurve, True)
+        if intFrame is None:
+            arrMask = np.ones(len(arrX), dtype=bool)
+        else:
+            arrMask = arrX == intFrame
+        if arrMask.any():
+            arrSelect[arrMask] = isSelected
+            fcurve.keyframe_points.foreach_set(
+                'select_control_point', arrSelect)
     return True
 
 
+def removeKeyframePoints(fcurve, arrMask):
+    # back to front so earlier indices stay valid, fast skips the recalculation per point, one update at the end or per batch
+    arrIndex = np.flatnonzero(arrMask)
+    if len(arrIndex) == 0:
+        return 0
+    setTimelineDirty(fcurve)
+    keyframe_points = fcurve.keyframe_points
+    for intIndex in reversed(arrIndex.tolist()):
+        keyframe_points.remove(keyframe_points[intIndex], fast=True)
+    setFCurveUpdate(fcurve)
+    return len(arrIndex)
+
+
+def removeKeyframes(obj, setFrames=None, strPath=None, inDataBlock=False, selected=False, truncate=False):
+    # every point on one of setFrames and/or selected, on the curves matching strPath (all when None)
+    # inDataBlock=None covers the object and the data curves in one call, truncate compares int(frame) like the old removeKeyframe
+    arrBlocks = [False, True] if inDataBlock is None else [inDataBlock]
+    intRemoved = 0
+    for isDataBlock in arrBlocks:
+        for fcurve in getPathFCurves(obj, strPath, isDataBlock):
+            arrX, arrY, arrSelect = getKeyframeArrays(fcurve, selected)
+            arrMask = np.ones(len(arrX), dtype=bool)
+            if setFrames is not None:
+                if truncate == True:
+                    arrX = np.trunc(arrX)
+                arrMask &= np.isin(arrX, list(setFrames))
+            if selected == True:
+                arrMask &= arrSelect
+            intRemoved += removeKeyframePoints(fcurve, arrMask)
+    return intRemoved
+
+
 def removeSelectedKeyframe(obj, strPath, inDataBlock=False):
-    arrFrames = []
-    objFCurve = getFCurveByPath(obj, strPath, inDataBlock)
-    if objFCurve != None:
-        for ii, keyframe in enumerate(objFCurve.keyframe_points):
-            if keyframe.select_control_point == True:
-                try:
-                    objFCurve.keyframe_points.remove(keyframe, fast=True)
-                except:
-                    pass
+    removeKeyframes(obj, None, strPath, inDataBlock, selected=True)
     return
 
 
 def removeKeyframe(obj, strPath, intFrame, inDataBlock=False):
-    arrFCurves = getFCurves(obj, inDataBlock)
-    for i, fcurve in enumerate(arrFCurves):
-        if fcurve.data_path == strPath or strPath == None:
-            for ii, keyframe in enumerate(fcurve.keyframe_points):
-                if int(keyframe.co.x) == intFrame:
-                    try:
-                        fcurve.keyframe_points.remove(keyframe, fast=True)
-                    except:
-                        pass
+    removeKeyframes(obj, {intFrame}, strPath, inDataBlock, truncate=True)
     return
 
 # keyframes.setKeyType(obj, '["key_object_id"]', intFrame+1, 'MOVING_HOLD')
@@ -201,40 +450,72 @@ def removeKeyframe(obj, strPath, intFrame, inDataBlock=False):
 def setKeyType(obj, strPath, intFrame, strType, inDataBlock=False):
     objFCurve = getFCurveByPath(obj, strPath, inDataBlock)
     if objFCurve != None:
-        for ii, keyframe in enumerate(objFCurve.keyframe_points):
-            if keyframe.co.x == intFrame:
-                try:
-                    keyframe.type = strType
-                except:
-                    pass
+        arrX, arrY, arrSelect = getKeyframeArrays(objFCurve)
+        for intIndex in np.flatnonzero(arrX == intFrame).tolist():
+            setKeyframeStyle(
+                objFCurve.keyframe_points[intIndex], strType=strType)
     return
 
 
+def getNudgedFrames(arrX, intStart, intMove, intStop=None):
+    # new frame per point and which points move, same rules as walking the points in order
+    # a point moves by intMove unless that passes intStop or the next key, and only past the previous key it left behind
+    arrX = arrX.astype(np.float64)
+    arrInt = np.trunc(arrX)
+    arrInRange = arrX >= intStart
+    if intStop != None:
+        arrInRange &= arrX < intStop
+    arrNewX = arrInt + intMove
+    if intStop:
+        arrNewX = np.minimum(arrNewX, intStop - 1)
+        # the next key's frame, keys on frame 0 or at intStop don't count
+        arrNext = np.append(arrInt[1:], 0)
+        arrNext[arrNext >= intStop] = 0
+        arrNewX = np.where((arrNext != 0) & (arrNewX >= arrNext),
+                           arrNext - 1, arrNewX)
+    arrIndex = np.flatnonzero(arrInRange)
+    arrCandidate = arrNewX[arrIndex]
+    arrOld = arrX[arrIndex]
+    arrValid = arrCandidate >= intStart
+    # each point compares against where the previous point in range ended up, one forward pass over the points in range
+    arrMoved = np.zeros(len(arrIndex), dtype=bool)
+    fltPrevious = 0
+    for i, (fltCandidate, fltOld, isValid) in enumerate(zip(arrCandidate.tolist(), arrOld.tolist(), arrValid.tolist())):
+        if isValid and fltCandidate > fltPrevious:
+            arrMoved[i] = True
+            fltPrevious = fltCandidate
+        else:
+            fltPrevious = fltOld
+    arrMask = np.zeros(len(arrX), dtype=bool)
+    arrMask[arrIndex[arrMoved]] = True
+    return arrMask, arrNewX
+
+
+def setKeyframeFrames(fcurve, arrMask, arrNewX, arrShift):
+    # move the masked points to arrNewX and their handles by arrShift, one foreach_get/set per attribute
+    keyframe_points = fcurve.keyframe_points
+    for strAttribute in ('co', 'handle_left', 'handle_right'):
+        arrCo = np.empty(len(keyframe_points) * 2, dtype=np.float32)
+        keyframe_points.foreach_get(strAttribute, arrCo)
+        arrFrames = arrCo[0::2]
+        if strAttribute == 'co':
+            arrFrames[arrMask] = arrNewX[arrMask]
+        else:
+            arrFrames[arrMask] += arrShift[arrMask]
+        keyframe_points.foreach_set(strAttribute, arrCo)
+    setFCurveUpdate(fcurve)
+
+
 def nudgeFrames(obj, intStart, intMove, inDataBlock=False, intStop=None, strPath=None):
-    arrFCurves = getFCurves(obj, inDataBlock)
-    for i, fcurve in enumerate(arrFCurves):
-        if fcurve.data_path == strPath or strPath == None:
-            intLastX = 0
-            for ii, keyframe_point in enumerate(fcurve.keyframe_points):
-                intNextFrame = None
-                if len(fcurve.keyframe_points) > ii+1:
-                    intNextFrame = int(fcurve.keyframe_points[ii+1].co.x)
-                    if intNextFrame and intStop and intNextFrame >= intStop:
-                        intNextFrame = None
-                if keyframe_point.co.x >= intStart and (intStop == None or intStop > keyframe_point.co.x):
-                    # lets make sure we aren't overwriting a keyframe_point
-                    intNewX = int(keyframe_point.co.x) + intMove
-                    if intStop and intNewX >= intStop:
-                        intNewX = intStop - 1
-                    if intStop and keyframe_point.co.x < intStop:
-                        # only working with stuff behind the current frame
-                        if intNextFrame and intNewX >= intNextFrame:
-                            intNewX = intNextFrame - 1
-                    if intNewX > intLastX and intNewX >= intStart:
-                        keyframe_point.co.x = intNewX
-                        keyframe_point.handle_left.x = keyframe_point.handle_left.x + intMove
-                        keyframe_point.handle_right.x = keyframe_point.handle_right.x + intMove
-                    intLastX = keyframe_point.co.x
+    for fcurve in getPathFCurves(obj, strPath, inDataBlock):
+        setTimelineDirty(fcurve)
+        arrX, arrY, arrSelect = getKeyframeArrays(fcurve)
+        arrMask, arrNewX = getNudgedFrames(
+            arrX, intStart, intMove, intStop)
+        if arrMask.any():
+            # handles move by intMove even when the key itself was held back
+            setKeyframeFrames(fcurve, arrMask, arrNewX,
+                              np.full(len(arrX), intMove))
     return
 
 
@@ -258,11 +539,12 @@ def getFrames(obj, strPath, intFrame, direction, mode='y', intCount=False):
     arrFrames = []
     objFCurve = getFCurveByPath(obj, strPath, False)
     if objFCurve != None:
-        for keyframe_point in objFCurve.keyframe_points:
-            if direction == '<' and keyframe_point.co.x < intFrame:
-                arrFrames.append(getattr(keyframe_point.co, mode))
-            elif direction == '>' and keyframe_point.co.x > intFrame:
-                arrFrames.append(getattr(keyframe_point.co, mode))
+        arrX, arrY, arrSelect = getKeyframeArrays(objFCurve)
+        arrValues = arrX if mode == 'x' else arrY
+        if direction == '<':
+            arrFrames = arrValues[arrX < intFrame].tolist()
+        elif direction == '>':
+            arrFrames = arrValues[arrX > intFrame].tolist()
         if intCount is not False and len(arrFrames) > intCount:
             if direction == '<':
                 arrFrames = arrFrames[-intCount]
@@ -273,22 +555,106 @@ def getFrames(obj, strPath, intFrame, direction, mode='y', intCount=False):
     return arrFrames
 
 
+#### || FRAME STATE RESOLVER ||####
+# an action's fcurves compiled once into writes grouped by owner collection and attribute
+# a frame state is then evaluated in one pass and written with one foreach_set per group
+PATH_ELEMENT = re.compile(r'^(.+)\[(\d+)\]\.(\w+)$')
+
+
+def getFrameStatePlan(objAction, strPrefix):
+    # kept with the fcurve index, so it is rebuilt whenever the index is
+    dicPlans = getFCurveIndex(objAction).setdefault('plans', {})
+    objPlan = dicPlans.get(strPrefix)
+    if objPlan is None:
+        dicGroups = {}
+        arrSingles = []
+        for fcurve in objAction.fcurves:
+            if fcurve.array_index is None or fcurve.data_path[0] == '[':
+                continue
+            objMatch = PATH_ELEMENT.match(fcurve.data_path)
+            if objMatch is None:
+                arrSingles.append(fcurve)
+                continue
+            arrKey = (strPrefix + objMatch.group(1), objMatch.group(3))
+            dicGroups.setdefault(arrKey, []).append(
+                (int(objMatch.group(2)), fcurve.array_index, fcurve))
+        arrGroups = []
+        for (strCollection, strAttribute), arrTargets in dicGroups.items():
+            arrGroups.append({
+                'collection': strCollection,
+                'attribute': strAttribute,
+                'elements': np.array([target[0] for target in arrTargets], dtype=np.int64),
+                'indices': np.array([target[1] for target in arrTargets], dtype=np.int64),
+                'fcurves': [target[2] for target in arrTargets],
+            })
+        objPlan = {'groups': arrGroups, 'singles': arrSingles}
+        dicPlans[strPrefix] = objPlan
+    return objPlan
+
+
+def getAttributeLayout(objCollection, strAttribute):
+    # values per element and buffer type of a collection attribute
+    objValue = getattr(objCollection[0], strAttribute)
+    intSize = 1
+    if hasattr(objValue, '__len__'):
+        intSize = len(objValue)
+        objValue = objValue[0]
+    if isinstance(objValue, bool):
+        return intSize, bool
+    if isinstance(objValue, int):
+        return intSize, np.int32
+    return intSize, np.float32
+
+
+def setSingleState(objTarget, strDataPath, fcurve, intFrame):
+    objData = objTarget.path_resolve(strDataPath)
+    intValue = fcurve.evaluate(intFrame)
+    if isinstance(objData, float):
+        # need to back string path off one and not use the array_index
+        arrDataPath = strDataPath.split('.')
+        strProperty = arrDataPath.pop()
+        objData = objTarget
+        if len(arrDataPath) > 0:
+            objData = objTarget.path_resolve('.'.join(arrDataPath))
+        setattr(objData, strProperty, intValue)
+    else:
+        objData[fcurve.array_index] = intValue
+
+
+def setGroupState(objTarget, objGroup, intFrame):
+    arrValues = np.array([fcurve.evaluate(intFrame)
+                         for fcurve in objGroup['fcurves']], dtype=np.float64)
+    try:
+        objCollection = objTarget.path_resolve(objGroup['collection'])
+    except ValueError:
+        objCollection = None
+    if not hasattr(objCollection, 'foreach_set') or len(objCollection) <= objGroup['elements'].max():
+        # not a collection on this target, resolve each fcurve like a single
+        for intElement, fcurve in zip(objGroup['elements'].tolist(), objGroup['fcurves']):
+            setSingleState(
+                objTarget, f'{objGroup["collection"]}[{intElement}].{objGroup["attribute"]}', fcurve, intFrame)
+        return
+    intSize, dtype = getAttributeLayout(objCollection, objGroup['attribute'])
+    arrBuffer = np.empty(len(objCollection) * intSize, dtype=dtype)
+    objCollection.foreach_get(objGroup['attribute'], arrBuffer)
+    arrBuffer[objGroup['elements'] * intSize +
+              objGroup['indices']] = arrValues
+    objCollection.foreach_set(objGroup['attribute'], arrBuffer)
+
+
 def transferFrameState(objSource, objTarget, intFrame, inDataBlock=False):
-    arrFcurves = getFCurves(objSource, inDataBlock)
-    for fcurve in arrFcurves:
-        if fcurve.array_index is not None and fcurve.data_path[0] != '[':
-            strDataPath = fcurve.data_path
-            if inDataBlock == True:
-                strDataPath = f'data.{strDataPath}'
-            objData = objTarget.path_resolve(strDataPath)
-            intValue = fcurve.evaluate(intFrame)
-            if isinstance(objData, float):
-                # need to back string path off one and not use the array_index
-                arrDataPath = strDataPath.split('.')
-                strProperty = arrDataPath.pop()
-                # objData = eval('.'.join(arrDataPath))
-                objData = objTarget.path_resolve('.'.join(arrDataPath))
-                setattr(objData, strProperty, intValue)
-            else:
-                objData[fcurve.array_index] = intValue
-            # except Exception as e:
+    objAction = getAction(objSource, inDataBlock)
+    if objAction is None:
+        return
+    strPrefix = 'data.' if inDataBlock == True else ''
+    objPlan = getFrameStatePlan(objAction, strPrefix)
+    for fcurve in objPlan['singles']:
+        setSingleState(objTarget, strPrefix + fcurve.data_path,
+                       fcurve, intFrame)
+    for objGroup in objPlan['groups']:
+        setGroupState(objTarget, objGroup, intFrame)
+    if len(objPlan['groups']) > 0:
+        # foreach_set doesn't tag the datablock for a redraw
+        objID = objTarget.data if inDataBlock == True else objTarget
+        if objID is not None:
+            objID.update_tag()
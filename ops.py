@@ -64,9 +64,11 @@ class KEY_OT_ClearKey(bpy.types.Operator):
                         bpy.ops.curve.delete(type='VERT')
                 else:
                     bpy.ops.object.mode_set(mode='OBJECT')
+                    actions.setEditTmp(obj)
                     actions.removeGeo(obj)
                     bpy.ops.object.mode_set(mode='EDIT')
             else:
+                actions.setEditTmp(obj)
                 actions.removeGeo(obj)
             # actions.setSwapObject(context, context.active_object, context.scene.frame_current)
         return {'FINISHED'}
@@ -100,36 +102,39 @@ class KEY_OT_InsertKey(bpy.types.Operator):
 
     def execute(self, context):
         if len(context.selected_objects) > 0:
-            for obj in context.selected_objects:
-                intFrame = context.scene.frame_current
-                if self.alt_pressed or self.ctrl_pressed:
-                    intDirection = 1
-                    if self.ctrl_pressed == True:
-                        intDirection = -1
-                    intNextFrame = intFrame+intDirection
-                    strAction = keyframes.getKeyframeVacancy(
-                        obj, '["key_object_id"]', intFrame, intNextFrame)
-                    if strAction == 'CURRENT':
-                        actions.setSwapObject(
-                            context, obj, intFrame)
-                    elif strAction == 'NEXT':
-                        context.scene.frame_set(intNextFrame)
-                        actions.setSwapObject(
-                            context, obj, intNextFrame)
+            with keyframes.deferUpdates():
+                for obj in context.selected_objects:
+                    intFrame = context.scene.frame_current
+                    if self.alt_pressed or self.ctrl_pressed:
+                        intDirection = 1
+                        if self.ctrl_pressed == True:
+                            intDirection = -1
+                        intNextFrame = intFrame+intDirection
+                        strAction = keyframes.getKeyframeVacancy(
+                            obj, '["key_object_id"]', intFrame, intNextFrame)
+                        if strAction == 'CURRENT':
+                            actions.setSwapObject(
+                                context, obj, intFrame)
+                        elif strAction == 'NEXT':
+                            # the frame change evaluates the curves, apply the pending updates first
+                            keyframes.commitUpdates()
+                            context.scene.frame_set(intNextFrame)
+                            actions.setSwapObject(
+                                context, obj, intNextFrame)
+                        else:
+                            intStartFrame = intFrame
+                            intStopFrame = None
+                            if intDirection == -1:
+                                intStartFrame = 0
+                                intStopFrame = intFrame
+                            keyframes.nudgeFrames(
+                                obj, intStartFrame, intDirection, False, intStopFrame)
+                            actions.setSwapObject(
+                                context, obj, intFrame)
                     else:
-                        intStartFrame = intFrame
-                        intStopFrame = None
-                        if intDirection == -1:
-                            intStartFrame = 0
-                            intStopFrame = intFrame
-                        keyframes.nudgeFrames(
-                            obj, intStartFrame, intDirection, False, intStopFrame)
+                        # default behavior, no key clicks
                         actions.setSwapObject(
                             context, obj, intFrame)
-                else:
-                    # default behavior, no key clicks
-                    actions.setSwapObject(
-                        context, obj, intFrame)
             if bpy.context.preferences.addons[__package__].preferences.KEY_UNSELECT == False:
                 keyframes.setKeySelection(
                     obj, intFrame, isSelected=False, strPath='["key_object_id"]', inDataBlock=False)
@@ -150,9 +155,10 @@ class KEY_OT_RemoveKey(bpy.types.Operator):
         return len(context.selected_objects) > 0
 
     def execute(self, context):
-        for obj in context.selected_objects:
-            actions.remove_keys(
-                obj, context.scene.frame_current, True)
+        with keyframes.deferUpdates():
+            for obj in context.selected_objects:
+                actions.remove_keys(
+                    obj, context.scene.frame_current, True)
         # actions.onFrame(context.scene)
         return {'FINISHED'}
 
@@ -183,31 +189,34 @@ class KEY_OT_BlankKey(bpy.types.Operator):
             if self.ctrl_pressed == True:
                 intDirection = -1
             intNextFrame = context.scene.frame_current+intDirection
-            for obj in context.selected_objects:
-                objBlank = actions.getBlankFrameObject(obj)
-                intSwapObjectID = actions.getNextSwapObjectId(obj)
-                strAction = keyframes.getKeyframeVacancy(
-                    obj, '["key_object_id"]', context.scene.frame_current, intNextFrame)
-                if strAction == 'CURRENT':
-                    actions.setSwapKey(obj, intSwapObjectID,
-                                       context.scene.frame_current, update=True, )
-                elif strAction == 'NEXT':
-                    context.scene.frame_set(intNextFrame)
-                    actions.setSwapKey(obj, intSwapObjectID,
-                                       intNextFrame, update=False)
-                else:
-                    intStartFrame = context.scene.frame_current
-                    intStopFrame = None
-                    if intDirection == -1:
-                        intStartFrame = 0
-                        intStopFrame = context.scene.frame_current
-                    keyframes.nudgeFrames(
-                        obj, intStartFrame, intDirection, False, intStopFrame)
-                    actions.setSwapKey(obj, intSwapObjectID,
-                                       context.scene.frame_current, update=False)
-                    if bpy.context.preferences.addons[__package__].preferences.KEY_UNSELECT == False:
-                        keyframes.setKeySelection(
-                            obj, context.scene.frame_current, isSelected=False, strPath='["key_object_id"]', inDataBlock=False)
+            with keyframes.deferUpdates():
+                for obj in context.selected_objects:
+                    objBlank = actions.getBlankFrameObject(obj)
+                    intSwapObjectID = actions.getNextSwapObjectId(obj)
+                    strAction = keyframes.getKeyframeVacancy(
+                        obj, '["key_object_id"]', context.scene.frame_current, intNextFrame)
+                    if strAction == 'CURRENT':
+                        actions.setSwapKey(obj, intSwapObjectID,
+                                           context.scene.frame_current, update=True, )
+                    elif strAction == 'NEXT':
+                        # the frame change evaluates the curves, apply the pending updates first
+                        keyframes.commitUpdates()
+                        context.scene.frame_set(intNextFrame)
+                        actions.setSwapKey(obj, intSwapObjectID,
+                                           intNextFrame, update=False)
+                    else:
+                        intStartFrame = context.scene.frame_current
+                        intStopFrame = None
+                        if intDirection == -1:
+                            intStartFrame = 0
+                            intStopFrame = context.scene.frame_current
+                        keyframes.nudgeFrames(
+                            obj, intStartFrame, intDirection, False, intStopFrame)
+                        actions.setSwapKey(obj, intSwapObjectID,
+                                           context.scene.frame_current, update=False)
+                        if bpy.context.preferences.addons[__package__].preferences.KEY_UNSELECT == False:
+                            keyframes.setKeySelection(
+                                obj, context.scene.frame_current, isSelected=False, strPath='["key_object_id"]', inDataBlock=False)
             actions.onFrame(context.scene)
         return {'FINISHED'}
 
@@ -236,12 +245,13 @@ class KEY_OT_CloneKey(bpy.types.Operator):
             if self.ctrl_pressed == True:
                 intDirection = -1
             intNextFrame = context.scene.frame_current + intDirection
-            for obj in context.selected_objects:
-                actions.clone_key(
-                    context, obj, context.scene.frame_current, intNextFrame)
-                if bpy.context.preferences.addons[__package__].preferences.KEY_UNSELECT == False:
-                    keyframes.setKeySelection(
-                        obj, context.scene.frame_current, isSelected=False, strPath='["key_object_id"]', inDataBlock=False)
+            with keyframes.deferUpdates():
+                for obj in context.selected_objects:
+                    actions.clone_key(
+                        context, obj, context.scene.frame_current, intNextFrame)
+                    if bpy.context.preferences.addons[__package__].preferences.KEY_UNSELECT == False:
+                        keyframes.setKeySelection(
+                            obj, context.scene.frame_current, isSelected=False, strPath='["key_object_id"]', inDataBlock=False)
             context.scene.frame_set(intNextFrame)
 
         return {'FINISHED'}
@@ -257,11 +267,12 @@ class KEY_OT_CloneUniqueKey(bpy.types.Operator):
         return len(context.selected_objects) > 0
 
     def execute(self, context):
-        for obj in context.selected_objects:
-            actions.clone_unique_key(context, obj, context.scene.frame_current)
-            if bpy.context.preferences.addons[__package__].preferences.KEY_UNSELECT == False:
-                keyframes.setKeySelection(
-                    obj, context.scene.frame_current, isSelected=False, strPath='["key_object_id"]', inDataBlock=False)
+        with keyframes.deferUpdates():
+            for obj in context.selected_objects:
+                actions.clone_unique_key(context, obj, context.scene.frame_current)
+                if bpy.context.preferences.addons[__package__].preferences.KEY_UNSELECT == False:
+                    keyframes.setKeySelection(
+                        obj, context.scene.frame_current, isSelected=False, strPath='["key_object_id"]', inDataBlock=False)
         return {'FINISHED'}
 
 
@@ -330,11 +341,12 @@ class KEY_OT_AddSpace(bpy.types.Operator):
             intStart = 0
             intStop = context.scene.frame_current
             intDirection = -1
-        for obj in context.selected_objects:
-            keyframes.nudgeFrames(
-                obj, intStart, intDirection, True, intStop)
-            keyframes.nudgeFrames(
-                obj, intStart, intDirection, False, intStop)
+        with keyframes.deferUpdates():
+            for obj in context.selected_objects:
+                keyframes.nudgeFrames(
+                    obj, intStart, intDirection, True, intStop)
+                keyframes.nudgeFrames(
+                    obj, intStart, intDirection, False, intStop)
         return {'FINISHED'}
 
 
@@ -367,11 +379,12 @@ class KEY_OT_RemoveSpace(bpy.types.Operator):
             intStart = 0
             intStop = context.scene.frame_current
             intDirection = 1
-        for obj in context.selected_objects:
-            keyframes.nudgeFrames(
-                obj, intStart, intDirection, True, intStop)
-            keyframes.nudgeFrames(
-                obj, intStart, intDirection, False, intStop)
+        with keyframes.deferUpdates():
+            for obj in context.selected_objects:
+                keyframes.nudgeFrames(
+                    obj, intStart, intDirection, True, intStop)
+                keyframes.nudgeFrames(
+                    obj, intStart, intDirection, False, intStop)
         return {'FINISHED'}
 
 
@@ -386,9 +399,10 @@ class KEY_OT_SetSpace(bpy.types.Operator):
         return len(context.selected_objects) > 0
 
     def execute(self, context):
-        for obj in context.selected_objects:
-            keyframes.setFrameSpacing(obj, context.scene.KEY_frameSpace, True)
-            keyframes.setFrameSpacing(obj, context.scene.KEY_frameSpace, False)
+        with keyframes.deferUpdates():
+            for obj in context.selected_objects:
+                keyframes.setFrameSpacing(obj, context.scene.KEY_frameSpace, True)
+                keyframes.setFrameSpacing(obj, context.scene.KEY_frameSpace, False)
         return {'FINISHED'}
 
 
@@ -403,9 +417,10 @@ class KEY_OT_NoSpace(bpy.types.Operator):
         return len(context.selected_objects) > 0
 
     def execute(self, context):
-        for obj in context.selected_objects:
-            keyframes.setFrameSpacing(obj, 1, True)
-            keyframes.setFrameSpacing(obj, 1, False)
+        with keyframes.deferUpdates():
+            for obj in context.selected_objects:
+                keyframes.setFrameSpacing(obj, 1, True)
+                keyframes.setFrameSpacing(obj, 1, False)
         return {'FINISHED'}
 
 
@@ -489,18 +504,127 @@ class KEY_OT_CombineObjects(bpy.types.Operator):
 
     def execute(self, context):
         if self.ctrl_pressed == True:
-            actions.addSwapObjects(
-                context, context.selected_objects, context.active_object)
+            with keyframes.deferUpdates():
+                actions.addSwapObjects(
+                    context, context.selected_objects, context.active_object)
             for obj in context.selected_objects:
                 if obj != context.active_object:
                     bpy.data.objects.remove(obj)
         else:
+            if context.active_object.get("key_id") is not None:
+                actions.setEditTmp(context.active_object)
             bpy.ops.object.join()
             actions.setSwapObject(context, context.active_object,
                                   context.scene.frame_current)
         return {'FINISHED'}
 
 
+class KEY_OT_DedupFrames(bpy.types.Operator):
+    """Share Identical Frames:  Frames with identical geometry, materials and data animation share one datablock"""
+    bl_idname = "key.dedup_frames"
+    bl_label = "Share Identical Frames"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objReport = actions.dedupFrames()
+        self.report({'INFO'}, f'{objReport["merged"]} of {objReport["frames"]} frames now share data, about {objReport["bytes"]/1048576:.1f} MB less memory and file size')
+        return {'FINISHED'}
+
+
+class KEY_OT_CleanFrames(bpy.types.Operator):
+    """Clean Up Frames:  Removes frame objects no longer used by any stop motion key, and tmp objects of removed stop motion objects"""
+    bl_idname = "key.clean_frames"
+    bl_label = "Clean Up Frames"
+    bl_options = {'REGISTER', 'UNDO'}
+    dry_run: bpy.props.BoolProperty(
+        name="Dry Run", description="Only report what would be removed", default=False)
+
+    def execute(self, context):
+        objReport = actions.removeOrphanFrames(self.dry_run)
+        strAction = 'removed'
+        if self.dry_run == True:
+            strAction = 'would remove'
+        self.report({'INFO'}, f'{strAction} {objReport["frames"]} frames, {objReport["tmps"]} tmp objects and {objReport["data"]} datablocks, about {objReport["bytes"]/1048576:.1f} MB')
+        return {'FINISHED'}
+
+
+class KEY_OT_CompressFrames(bpy.types.Operator):
+    """Compress Frames:  Frames with the same topology keep one base mesh and only store their vertex positions"""
+    bl_idname = "key.compress_frames"
+    bl_label = "Compress Frames"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @ classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
+
+    def execute(self, context):
+        intFrames = 0
+        intBytes = 0
+        for obj in context.selected_objects:
+            objReport = actions.compressFrames(obj)
+            intFrames += objReport['frames']
+            intBytes += objReport['bytes']
+        self.report(
+            {'INFO'}, f'compressed {intFrames} frames, about {intBytes/1048576:.1f} MB saved')
+        return {'FINISHED'}
+
+
+class KEY_OT_ExpandFrames(bpy.types.Operator):
+    """Expand Frames:  Gives every compressed frame its own full mesh again"""
+    bl_idname = "key.expand_frames"
+    bl_label = "Expand Frames"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @ classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
+
+    def execute(self, context):
+        intFrames = 0
+        for obj in context.selected_objects:
+            intFrames += actions.expandFrames(obj)
+        self.report({'INFO'}, f'expanded {intFrames} frames')
+        return {'FINISHED'}
+
+
+class KEY_OT_SwapMode(bpy.types.Operator):
+    """Swap In Place:  Frames with the same topology only update vertex positions on one mesh instead of swapping meshes"""
+    bl_idname = "key.swap_mode"
+    bl_label = "Swap In Place"
+    bl_options = {'REGISTER', 'UNDO'}
+    in_place: bpy.props.BoolProperty(
+        name="In Place", description="Update vertex positions instead of swapping meshes", default=True)
+
+    @ classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
+
+    def execute(self, context):
+        for obj in context.selected_objects:
+            actions.setInPlace(obj, self.in_place)
+        return {'FINISHED'}
+
+
+class KEY_OT_BenchmarkSwap(bpy.types.Operator):
+    """Benchmark Swap:  Times showing every frame of the active object with mesh swaps and with in place updates"""
+    bl_idname = "key.benchmark_swap"
+    bl_label = "Benchmark Swap"
+
+    @ classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.get("key_id") is not None and context.object.mode == 'OBJECT'
+
+    def execute(self, context):
+        objReport = actions.benchmarkSwap(context, context.object)
+        if objReport is None:
+            self.report({'WARNING'}, 'no frames to benchmark')
+            return {'CANCELLED'}
+        self.report(
+            {'INFO'}, f'{objReport["frames"]} frames, mesh swap {objReport["data"]:.2f} ms, in place {objReport["inplace"]:.2f} ms per frame')
+        return {'FINISHED'}
+
+
 class KEY_OT_PinFrames(bpy.types.Operator):
     """Pin Frame:  Sets the selected object/s to be used as a reference.
     Click:  Pins the current selection
@@ -555,6 +679,8 @@ class KEY_OT_MergeData(bpy.types.Operator):
         return context.active_object is not None and len(context.selected_objects) > 0
 
     def execute(self, context):
+        if context.active_object.get("key_id") is not None:
+            actions.setEditTmp(context.active_object)
         bpy.ops.object.join()
         actions.setSwapObject(context, context.active_object,
                               context.scene.frame_current)
@@ -666,6 +792,12 @@ arrClasses = [
     KEY_OT_NoSpace,
     KEY_OT_SeparateObjects,
     KEY_OT_CombineObjects,
+    KEY_OT_DedupFrames,
+    KEY_OT_CleanFrames,
+    KEY_OT_CompressFrames,
+    KEY_OT_ExpandFrames,
+    KEY_OT_SwapMode,
+    KEY_OT_BenchmarkSwap,
     KEY_OT_PinFrames,
     KEY_OT_UnPinFrames,
     KEY_OT_MergeData,
@@ -1,4 +1,5 @@
 import bpy
+from . import actions
 
 
 class PanelProps(bpy.types.PropertyGroup):
@@ -20,11 +21,20 @@ def register():
         name="State", default="")
     bpy.types.Scene.KEY_apply_modifiers = bpy.props.BoolProperty(
         name="modifiers", default=False)
+    bpy.types.Scene.KEY_stream = bpy.props.BoolProperty(
+        name="Stream Frames", description="Keep only frames near the playhead in memory, the rest wait in stream files next to the .blend", default=False, update=actions.setStreaming)
+    bpy.types.Scene.KEY_stream_window = bpy.props.IntProperty(
+        name="Window", description="Frames before and after the playhead that stay in memory", default=24, min=1, max=1000)
+    bpy.types.Scene.KEY_stream_cache = bpy.props.IntProperty(
+        name="Cache", description="Frames kept in memory before the least recently used are offloaded", default=100, min=1, max=100000)
 
 
 def unregister():
     bpy.utils.unregister_class(PanelProps)
     del bpy.types.Scene.KEY_apply_modifiers
+    del bpy.types.Scene.KEY_stream
+    del bpy.types.Scene.KEY_stream_window
+    del bpy.types.Scene.KEY_stream_cache
     del bpy.types.Scene.KEY_frameSpace
     del bpy.types.Scene.KEY_count
     del bpy.types.WindowManager.KEY_UI
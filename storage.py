@@ -0,0 +1,203 @@
+import bpy
+import collections
+import numpy as np
+from . import fingerprint
+from . import stream
+
+#### || DELTA FRAMES ||####
+# frames of a key_id that share topology keep one base mesh, each frame stores only its vertex positions
+# key_delta_index = moved vertex indices, key_delta_co = their offsets from the base (or every position when no index)
+# both are stored as raw int32/float32 bytes, files from older versions hold lists of python numbers
+# the frame object's data is the base mesh, the frame is rebuilt into a display copy of the base when shown
+
+# bytes of decoded delta positions kept in memory, least recently shown frames are dropped first
+DELTA_CACHE = 64 * 1024 * 1024
+
+dicBaseCo = {}
+dicDeltaCo = collections.OrderedDict()
+objDeltaCache = {'bytes': 0}
+dicDisplayData = {}
+
+
+def isDeltaFrame(objFrame):
+    return objFrame.get("key_delta_co") is not None
+
+
+def isDisplayData(objData):
+    return objData is not None and objData.get("key_delta_display") is not None
+
+
+def getTopologyKey(objFrame):
+    objData = objFrame.data
+    if not isinstance(objData, bpy.types.Mesh) or objData.library is not None or isDeltaFrame(objFrame):
+        return None
+    stream.setResident(objData, objFrame)
+    # anything that isn't stored per vertex position stays a full frame
+    if objData.shape_keys is not None or len(objFrame.vertex_groups) > 0 or objData.has_custom_normals:
+        return None
+    if objData.animation_data is not None and objData.animation_data.action is not None:
+        return None
+    return fingerprint.getTopologyFingerprint(objData)
+
+
+def getBaseCo(objBase):
+    intPointer = objBase.as_pointer()
+    arrCached = dicBaseCo.get(intPointer)
+    if arrCached is None or len(arrCached) != len(objBase.vertices) * 3:
+        arrCached = fingerprint.getArray(objBase.vertices, 'co', 3)
+        dicBaseCo[intPointer] = arrCached
+    return arrCached
+
+
+def getStoredArray(objValue, dtype):
+    if isinstance(objValue, bytes):
+        return np.frombuffer(objValue, dtype=dtype)
+    return np.array(objValue, dtype=dtype)
+
+
+def setDeltaCache(intPointer, arrCached=None):
+    # arrCached None drops the entry
+    arrOld = dicDeltaCo.pop(intPointer, None)
+    if arrOld is not None:
+        objDeltaCache['bytes'] -= arrOld[3]
+    if arrCached is None:
+        return
+    dicDeltaCo[intPointer] = arrCached
+    objDeltaCache['bytes'] += arrCached[3]
+    while objDeltaCache['bytes'] > DELTA_CACHE and len(dicDeltaCo) > 1:
+        intOldest, arrOld = dicDeltaCo.popitem(last=False)
+        objDeltaCache['bytes'] -= arrOld[3]
+
+
+def getDeltaCo(objFrame):
+    intPointer = objFrame.as_pointer()
+    # reading a bytes property copies it, so entries are checked by name only and dropped by compress, expand, load and undo
+    arrCached = dicDeltaCo.get(intPointer)
+    if arrCached is None or arrCached[0] != objFrame.name_full:
+        arrIndex = None
+        if objFrame.get("key_delta_index") is not None:
+            arrIndex = getStoredArray(objFrame["key_delta_index"], np.int32)
+        arrCo = getStoredArray(objFrame["key_delta_co"], np.float32)
+        intBytes = arrCo.nbytes
+        if arrIndex is not None:
+            intBytes += arrIndex.nbytes
+        arrCached = (objFrame.name_full, arrIndex, arrCo, intBytes)
+        setDeltaCache(intPointer, arrCached)
+    else:
+        dicDeltaCo.move_to_end(intPointer)
+    return arrCached[1], arrCached[2]
+
+
+def getFrameCo(objFrame):
+    arrIndex, arrCo = getDeltaCo(objFrame)
+    if arrIndex is None:
+        return arrCo
+    arrFrameCo = getBaseCo(objFrame.data).copy().reshape(-1, 3)
+    arrFrameCo[arrIndex] += arrCo.reshape(-1, 3)
+    return arrFrameCo.ravel()
+
+
+def getFrameCoords(objFrame):
+    # vertex positions of a frame without building its datablock
+    if isDeltaFrame(objFrame):
+        return getFrameCo(objFrame)
+    return fingerprint.getArray(stream.setResident(objFrame.data, objFrame).vertices, 'co', 3)
+
+
+def getDisplayData(objBase):
+    # one reusable copy of each base mesh receives the positions of whichever frame is shown
+    objDisplay = dicDisplayData.get(objBase.as_pointer())
+    try:
+        if objDisplay is not None and objDisplay.get("key_delta_base") == objBase:
+            return objDisplay
+    except ReferenceError:
+        pass
+    objDisplay = objBase.copy()
+    objDisplay.name = f'{objBase.name}_delta'
+    objDisplay.use_fake_user = False
+    objDisplay["key_delta_display"] = True
+    objDisplay["key_delta_base"] = objBase
+    dicDisplayData[objBase.as_pointer()] = objDisplay
+    return objDisplay
+
+
+def getFrameData(objFrame):
+    # the datablock to display for a frame object, full frames just use their own data
+    if not isDeltaFrame(objFrame):
+        return stream.setResident(objFrame.data, objFrame)
+    objDisplay = getDisplayData(objFrame.data)
+    if objDisplay.get("key_delta_frame") != objFrame.name_full:
+        objDisplay.vertices.foreach_set('co', getFrameCo(objFrame))
+        objDisplay.update()
+        objDisplay["key_delta_frame"] = objFrame.name_full
+        fingerprint.setFingerprintDirty(objDisplay)
+    return objDisplay
+
+
+def setFullFrame(objFrame):
+    # the frame got its own datablock back, drop its stored positions
+    for strProp in ("key_delta_co", "key_delta_index"):
+        if strProp in objFrame:
+            del objFrame[strProp]
+    setDeltaCache(objFrame.as_pointer())
+
+
+def compressFrames(arrFrames, fltSparse=0.5):
+    # group by topology, the first frame of each group becomes the base
+    # returns the datablocks no longer used and an estimate of the bytes saved
+    dicClasses = {}
+    for objFrame in arrFrames:
+        strKey = getTopologyKey(objFrame)
+        if strKey is not None:
+            dicClasses.setdefault(strKey, []).append(objFrame)
+    arrUnused = []
+    intBytes = 0
+    for arrClass in dicClasses.values():
+        objBase = arrClass[0].data
+        arrBaseCo = getBaseCo(objBase)
+        for objFrame in arrClass[1:]:
+            objData = objFrame.data
+            if objData == objBase:
+                continue
+            arrCo = fingerprint.getArray(objData.vertices, 'co', 3)
+            arrDelta = (arrCo - arrBaseCo).reshape(-1, 3)
+            arrMoved = np.flatnonzero(np.any(arrDelta != 0, axis=1))
+            if len(arrMoved) == 0:
+                # identical geometry, sharing the base is enough
+                setFullFrame(objFrame)
+            elif len(arrMoved) < len(arrDelta) * fltSparse:
+                objFrame["key_delta_index"] = arrMoved.astype(
+                    np.int32).tobytes()
+                objFrame["key_delta_co"] = arrDelta[arrMoved].astype(
+                    np.float32).tobytes()
+                intBytes -= len(arrMoved) * 16
+            else:
+                if "key_delta_index" in objFrame:
+                    del objFrame["key_delta_index"]
+                objFrame["key_delta_co"] = arrCo.astype(np.float32).tobytes()
+                intBytes -= len(arrCo) * 4
+            setDeltaCache(objFrame.as_pointer())
+            objFrame.data = objBase
+            if objData.users <= int(objData.use_fake_user) and objData not in arrUnused:
+                arrUnused.append(objData)
+    return arrUnused, intBytes
+
+
+def expandFrame(objFrame):
+    # back to a full frame with its own mesh
+    if isDeltaFrame(objFrame):
+        objData = objFrame.data.copy()
+        objData.use_fake_user = True
+        objData.vertices.foreach_set('co', getFrameCo(objFrame))
+        objData.update()
+        fingerprint.setFingerprintDirty(objData)
+        setFullFrame(objFrame)
+        objFrame.data = objData
+    return objFrame.data
+
+
+def clearCache():
+    dicBaseCo.clear()
+    dicDeltaCo.clear()
+    objDeltaCache['bytes'] = 0
+    dicDisplayData.clear()
@@ -0,0 +1,329 @@
+import bpy
+import os
+import time
+import hashlib
+import collections
+import numpy as np
+from bpy.app.handlers import persistent
+from . import fingerprint
+
+#### || FRAME STREAMING ||####
+# mesh geometry of frames away from the playhead is written to .npz files next to the .blend and cleared from the datablock
+# the datablock itself stays, so frame objects, materials and frames sharing it keep pointing at it, geometry is reloaded on demand
+# key_stream on the datablock holds the file its geometry is in, files are named by the digest of their arrays so offloading
+# the same geometry again reuses its file, the files outlive the session so undo, autosaves and recovered sessions
+# can still reload them, they are pruned once they haven't been used for STREAM_EXPIRE
+
+STREAM_PROP = 'key_stream'
+# frames offloaded or prefetched per frame change, the current frame is always loaded right away
+STREAM_BATCH = 8
+# seconds a stream file is kept, long enough for any autosave or quit.blend to be recovered
+STREAM_EXPIRE = 7 * 24 * 60 * 60
+# attribute data type: (foreach attribute, values per element, buffer type)
+ATTRIBUTE_TYPES = fingerprint.ATTRIBUTE_TYPES
+
+# resident frame datablocks by pointer, least recently used first, [datablock, frame object]
+dicResident = collections.OrderedDict()
+objStream = {'frame': None, 'direction': 1, 'saved': []}
+# folders already pruned this session and files that couldn't be loaded, reported once
+setPruned = set()
+setMissing = set()
+
+
+def isOffloaded(objData):
+    return objData is not None and objData.get(STREAM_PROP) is not None
+
+
+def isFrameObject(objFrame):
+    # only frame objects from the registry are streamed, never swap objects or tmp objects
+    return objFrame is not None and objFrame.get("key_frame_id") is not None and objFrame.get("key_tmp") is None
+
+
+def getStreamFolder():
+    # next to the .blend, or blender's user data folder for files never saved, not the session temp folder
+    arrFolders = []
+    if bpy.data.filepath:
+        strBlend = os.path.splitext(os.path.basename(bpy.data.filepath))[0]
+        arrFolders.append(os.path.join(os.path.dirname(
+            bpy.data.filepath), f'{strBlend}_stream'))
+    arrFolders.append(bpy.utils.user_resource(
+        'DATAFILES', path='animix_stream'))
+    for strFolder in arrFolders:
+        try:
+            os.makedirs(strFolder, exist_ok=True)
+        except OSError:
+            continue
+        if strFolder not in setPruned:
+            setPruned.add(strFolder)
+            pruneFolder(strFolder)
+        return strFolder
+    return None
+
+
+def pruneFolder(strFolder):
+    fltExpire = time.time() - STREAM_EXPIRE
+    for strFile in os.listdir(strFolder):
+        strPath = os.path.join(strFolder, strFile)
+        try:
+            if strFile.endswith(('.npz', '.npz.tmp')) and os.path.getmtime(strPath) < fltExpire:
+                os.remove(strPath)
+        except OSError:
+            pass
+
+
+def getStreamPath(dicArrays):
+    # named by content, equal geometry shares one file and a reloaded frame that didn't change gets its old file back
+    strFolder = getStreamFolder()
+    if strFolder is None:
+        return None
+    objHash = hashlib.blake2b(digest_size=16)
+    for strKey, arrValues in dicArrays.items():
+        objHash.update(strKey.encode())
+        objHash.update(str(arrValues.shape).encode())
+        objHash.update(np.ascontiguousarray(arrValues).tobytes())
+    return os.path.join(strFolder, f'{objHash.hexdigest()}.npz')
+
+
+def writeStream(strPath, dicArrays):
+    if os.path.exists(strPath):
+        # keeps it from being pruned while it is still referenced
+        os.utime(strPath)
+        return
+    # written aside and moved in place, a file interrupted halfway never takes the name of its content
+    strTmp = f'{strPath}.tmp'
+    with open(strTmp, 'wb') as objFile:
+        np.savez(objFile, **dicArrays)
+    os.replace(strTmp, strPath)
+
+
+def getAttributes(objData):
+    # user and builtin attributes except positions, internal ones (.edge_verts etc.) are written through the mesh api
+    return [objAttribute for objAttribute in objData.attributes
+            if objAttribute.name != 'position' and not objAttribute.name.startswith('.')]
+
+
+def canOffload(objFrame):
+    objData = objFrame.data
+    if not isinstance(objData, bpy.types.Mesh) or objData.library is not None or isOffloaded(objData):
+        return False
+    # only what the .npz holds, everything else stays in memory
+    if bpy.app.version < (3, 5, 0) or objData.is_editmode or objData.shape_keys is not None or objData.has_custom_normals:
+        return False
+    if len(objFrame.vertex_groups) > 0 or objData.get("key_delta_display") is not None or objFrame.get("key_delta_co") is not None:
+        return False
+    return all(objAttribute.data_type in ATTRIBUTE_TYPES for objAttribute in getAttributes(objData))
+
+
+def offloadData(objData):
+    dicArrays = {
+        'co': fingerprint.getArray(objData.vertices, 'co', 3),
+        'edges': fingerprint.getArray(objData.edges, 'vertices', 2, np.int32),
+        'loop_vertex': fingerprint.getArray(objData.loops, 'vertex_index', 1, np.int32),
+        'loop_edge': fingerprint.getArray(objData.loops, 'edge_index', 1, np.int32),
+        'loop_start': fingerprint.getArray(objData.polygons, 'loop_start', 1, np.int32),
+        'loop_total': fingerprint.getArray(objData.polygons, 'loop_total', 1, np.int32),
+    }
+    arrMeta = []
+    for i, objAttribute in enumerate(getAttributes(objData)):
+        strValue, intSize, dtype = ATTRIBUTE_TYPES[objAttribute.data_type]
+        dicArrays[f'attribute_{i}'] = fingerprint.getArray(
+            objAttribute.data, strValue, intSize, dtype)
+        arrMeta.append((objAttribute.name, objAttribute.domain,
+                       objAttribute.data_type))
+    dicArrays['meta'] = np.array(arrMeta, dtype=str).reshape(-1, 3)
+    strUV = ''
+    if objData.uv_layers.active is not None:
+        strUV = objData.uv_layers.active.name
+    dicArrays['uv_active'] = np.array([strUV])
+    strPath = getStreamPath(dicArrays)
+    if strPath is None:
+        return False
+    try:
+        writeStream(strPath, dicArrays)
+    except OSError:
+        return False
+    objData.clear_geometry()
+    objData[STREAM_PROP] = strPath
+    dicResident.pop(objData.as_pointer(), None)
+    return True
+
+
+def readStream(strPath):
+    # every array of a stream file, None when it is missing, unreadable or doesn't add up
+    try:
+        with np.load(strPath) as dicFile:
+            dicArrays = {strKey: dicFile[strKey] for strKey in dicFile.files}
+    except Exception as objError:
+        print('stop motion could not read the streamed frame data', strPath, objError)
+        return None
+    try:
+        intLoops = len(dicArrays['loop_vertex'])
+        if len(dicArrays['co']) % 3 != 0 or len(dicArrays['edges']) % 2 != 0:
+            return None
+        if len(dicArrays['loop_edge']) != intLoops or len(dicArrays['loop_total']) != len(dicArrays['loop_start']):
+            return None
+        if int(dicArrays['loop_total'].sum()) != intLoops:
+            return None
+        dicDomains = {
+            'POINT': len(dicArrays['co']) // 3,
+            'EDGE': len(dicArrays['edges']) // 2,
+            'FACE': len(dicArrays['loop_start']),
+            'CORNER': intLoops,
+        }
+        for i, (strName, strDomain, strType) in enumerate(dicArrays['meta']):
+            arrType = ATTRIBUTE_TYPES.get(str(strType))
+            if arrType is None or len(dicArrays[f'attribute_{i}']) != dicDomains[str(strDomain)] * arrType[1]:
+                return None
+        if len(dicArrays['uv_active']) != 1:
+            return None
+    except (KeyError, ValueError):
+        return None
+    return dicArrays
+
+
+def loadData(objData):
+    # the file is read and checked before the datablock is touched, the marker only goes once the geometry is back
+    # a missing or broken file leaves the datablock as it is for a later retry
+    strPath = objData[STREAM_PROP]
+    dicArrays = None
+    if os.path.exists(strPath):
+        dicArrays = readStream(strPath)
+    if dicArrays is None:
+        if strPath not in setMissing:
+            setMissing.add(strPath)
+            print('stop motion could not load the streamed frame data',
+                  objData.name, strPath)
+        return False
+    objData.clear_geometry()
+    objData.vertices.add(len(dicArrays['co']) // 3)
+    objData.edges.add(len(dicArrays['edges']) // 2)
+    objData.loops.add(len(dicArrays['loop_vertex']))
+    objData.polygons.add(len(dicArrays['loop_start']))
+    objData.vertices.foreach_set('co', dicArrays['co'])
+    objData.edges.foreach_set('vertices', dicArrays['edges'])
+    objData.loops.foreach_set('vertex_index', dicArrays['loop_vertex'])
+    objData.loops.foreach_set('edge_index', dicArrays['loop_edge'])
+    objData.polygons.foreach_set('loop_start', dicArrays['loop_start'])
+    # read only in newer versions, the totals follow from loop_start there
+    if not bpy.types.MeshPolygon.bl_rna.properties['loop_total'].is_readonly:
+        objData.polygons.foreach_set('loop_total', dicArrays['loop_total'])
+    for i, (strName, strDomain, strType) in enumerate(dicArrays['meta']):
+        strName, strDomain, strType = str(strName), str(strDomain), str(strType)
+        objAttribute = objData.attributes.get(strName)
+        if objAttribute is None:
+            objAttribute = objData.attributes.new(
+                strName, strType, strDomain)
+        strValue = ATTRIBUTE_TYPES[strType][0]
+        objAttribute.data.foreach_set(
+            strValue, dicArrays[f'attribute_{i}'])
+    strUV = str(dicArrays['uv_active'][0])
+    if strUV in objData.uv_layers:
+        objData.uv_layers.active = objData.uv_layers[strUV]
+    del objData[STREAM_PROP]
+    objData.update()
+    return True
+
+
+def setResident(objData, objFrame=None):
+    # make sure the geometry is in memory and mark the datablock as most recently used
+    if objData is None:
+        return objData
+    if isOffloaded(objData):
+        loadData(objData)
+    intPointer = objData.as_pointer()
+    arrResident = dicResident.get(intPointer)
+    if arrResident is None:
+        if isFrameObject(objFrame):
+            dicResident[intPointer] = [objData, objFrame]
+    else:
+        if isFrameObject(objFrame):
+            arrResident[1] = objFrame
+        dicResident.move_to_end(intPointer)
+    return objData
+
+
+def setDirection(intFrame):
+    # playback direction from the last two frame changes, prefetching follows it
+    if objStream['frame'] is not None and intFrame != objStream['frame']:
+        objStream['direction'] = 1 if intFrame > objStream['frame'] else -1
+    objStream['frame'] = intFrame
+    return objStream['direction']
+
+
+def updateResidency(arrFrames, arrKeep, arrPrefetch, intCapacity):
+    # arrFrames, every frame object of the playing swap groups, arrKeep, frames inside the window
+    # arrPrefetch, frames ahead of the playhead in playing order
+    for objFrame in arrFrames:
+        objData = objFrame.data
+        if objData is not None and objData.as_pointer() not in dicResident and not isOffloaded(objData):
+            # frames never shown count as least recently used
+            dicResident[objData.as_pointer()] = [objData, objFrame]
+            dicResident.move_to_end(objData.as_pointer(), last=False)
+    setKeep = set()
+    for objFrame in arrKeep:
+        if objFrame.data is not None:
+            setKeep.add(objFrame.data.as_pointer())
+    intLoaded = 0
+    for objFrame in arrPrefetch:
+        if intLoaded >= STREAM_BATCH:
+            break
+        if isOffloaded(objFrame.data):
+            intLoaded += 1
+        setResident(objFrame.data, objFrame)
+    intOffloaded = 0
+    for intPointer in list(dicResident.keys()):
+        if len(dicResident) <= intCapacity or intOffloaded >= STREAM_BATCH:
+            break
+        objData, objFrame = dicResident[intPointer]
+        try:
+            if intPointer in setKeep or not isFrameObject(objFrame) or objFrame.data != objData or not canOffload(objFrame):
+                continue
+        except ReferenceError:
+            del dicResident[intPointer]
+            continue
+        # a datablock shown by any other object stays, frames only hold it with the frame object and fake user
+        if objData.users > 1 + int(objData.use_fake_user):
+            continue
+        if offloadData(objData):
+            intOffloaded += 1
+
+
+def restoreAll():
+    # the datablocks that were loaded back
+    arrRestored = []
+    for objData in bpy.data.meshes:
+        if isOffloaded(objData) and loadData(objData):
+            arrRestored.append(objData)
+    return arrRestored
+
+
+@persistent
+def onSave(*args):
+    # the .blend must hold every frame, stream files may be pruned or never travel with it
+    objStream['saved'] = restoreAll()
+
+
+@persistent
+def onSavePost(*args):
+    # offload again what was restored for the save, the files are still there so nothing is written
+    for objData in objStream['saved']:
+        try:
+            if not isOffloaded(objData):
+                offloadData(objData)
+        except ReferenceError:
+            pass
+    objStream['saved'] = []
+
+
+@persistent
+def onLoad(*args):
+    # autosaves and recovered sessions written while streaming still point at stream files
+    clearCache()
+    restoreAll()
+
+
+def clearCache():
+    dicResident.clear()
+    setMissing.clear()
+    objStream['frame'] = None
+    objStream['saved'] = []